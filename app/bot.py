@@ -10,10 +10,14 @@ from discord.ext.commands import Context
 
 from .cogs import cog_list
 from .common.logger import get_logger
+from .common.utils.metrics import metrics
+from .core.agent.download import close_http_session
 from .core.database import create_db_and_tables
 
 logger = get_logger(__name__)
 
+METRICS_LOG_INTERVAL = float(os.getenv("METRICS_LOG_INTERVAL", "5"))
+
 
 class ServantBot(commands.Bot):
     def __init__(self, intents: discord.Intents) -> None:
@@ -57,6 +61,19 @@ class ServantBot(commands.Bot):
             logger.warning("Status file not found, using default status")
             return ["limeskin"]
 
+    @tasks.loop(minutes=METRICS_LOG_INTERVAL or 1.0)
+    async def metrics_task(self) -> None:
+        """
+        Log a snapshot of the queue, cache and pool metrics.
+        """
+        snapshot = metrics.snapshot()
+        logger.info(
+            "metrics: "
+            + " ".join(
+                f"{name}={value:.4g}" for name, value in sorted(snapshot.items())
+            )
+        )
+
     @status_task.before_loop
     async def before_status_task(self) -> None:
         """
@@ -80,6 +97,12 @@ class ServantBot(commands.Bot):
         await self.load_cogs()
         await self.load_db()
         self.status_task.start()
+        if METRICS_LOG_INTERVAL > 0:
+            self.metrics_task.start()
+
+    async def close(self) -> None:
+        await close_http_session()
+        await super().close()
 
     async def on_ready(self) -> None:
         logger.info("Sync starting...")
@@ -1,25 +1,74 @@
+import asyncio
 import logging
+import os
 from typing import TYPE_CHECKING
 
 from agents import ItemHelpers
-from discord import ChannelType, app_commands
-from discord.ext import commands
+from discord import ChannelType, HTTPException, app_commands
+from discord.ext import commands, tasks
+from openai.types.responses import ResponseTextDeltaEvent
 
-from app.common.utils.text_splitter import split_into_chunks
+from app.common.utils.metrics import metrics
+from app.common.utils.text_splitter import IncrementalSplitter
 from app.core.agent import Messenger, controller, handler
+from app.core.agent.queue import ThreadDispatcher, raise_if_cancelled
+from app.core.agent.retrieval import retriever
 
 if TYPE_CHECKING:
-    from discord import Message
+    from agents import StreamEvent
+    from discord import Message, Thread
     from discord.ext.commands import Context
 
     from app.bot import ServantBot
 
 logger = logging.getLogger(__name__)
 
+STREAMING = os.getenv("AGENT_STREAMING", "true").lower() == "true"
+MAX_CONCURRENCY = int(os.getenv("AGENT_MAX_CONCURRENCY", "8"))
+MAX_PENDING = int(os.getenv("AGENT_MAX_PENDING", "5"))
+COALESCE = os.getenv("AGENT_COALESCE", "true").lower() == "true"
+CANCEL_ON_NEW = os.getenv("AGENT_CANCEL_ON_NEW", "false").lower() == "true"
+THREAD_INFO_TIMEOUT = float(os.getenv("THREAD_INFO_TIMEOUT", "15"))
+
+PLACEHOLDER_TITLE = "새로운 채팅"
+PLACEHOLDER_MESSAGE = "채팅을 준비하고 있어요..."
+FALLBACK_MESSAGE = "새로운 채팅이 시작됐어요! 스레드에 메시지를 남겨 주세요."
+CANCELLED_MESSAGE = "새 메시지가 도착해서 답변을 중단했어요."
+FAILED_MESSAGE = "답변을 만들지 못했어요. 잠시 후 다시 시도해 주세요."
+
 
 class Agent(commands.Cog, name="agent"):
     def __init__(self, bot: "ServantBot") -> None:
         self.bot = bot
+        self.dispatcher = ThreadDispatcher["Message"](
+            self.respond,
+            max_concurrency=MAX_CONCURRENCY,
+            max_pending=MAX_PENDING,
+            coalesce=COALESCE,
+            cancel_on_new=CANCEL_ON_NEW,
+        )
+        self._background: set[asyncio.Task] = set()
+
+    async def cog_load(self) -> None:
+        metrics.register("agent.dispatcher", self.dispatcher.stats)
+        handler.refill_thread_info_pool()
+        self.cleanup_task.start()
+
+    async def cog_unload(self) -> None:
+        self.cleanup_task.cancel()
+        metrics.unregister("agent.dispatcher")
+        await handler.message_store.flush()
+
+    @tasks.loop(hours=24)
+    async def cleanup_task(self) -> None:
+        try:
+            await retriever.cleanup()
+        except Exception:
+            logger.exception("Failed to clean up document chunks")
+
+    @cleanup_task.before_loop
+    async def before_cleanup_task(self) -> None:
+        await self.bot.wait_until_ready()
 
     @commands.hybrid_group(name="agent")
     async def agent(self, context: "Context") -> None:
@@ -28,13 +77,35 @@ class Agent(commands.Cog, name="agent"):
     @agent.command(name="new", description="새로운 채팅 시작")
     @app_commands.describe(goal="채팅 설명")
     async def new(self, context: "Context", *, goal: str = "") -> None:
-        result = await handler.gen_thread_info(
-            thread_id=context.channel.id,
-            user_id=context.author.id,
-            message=goal,
-        )
-        await controller.setup_new_chat(context, result.title, result.nofication)
+        # 제목 생성을 기다리지 않고 스레드부터 만들어 interaction 응답 시간을 지킴
+        title = " ".join(goal.split())[:100] or PLACEHOLDER_TITLE
+        thread = await controller.setup_new_chat(context, title, PLACEHOLDER_MESSAGE)
         logger.info(f"created new chat: {context.author.name}")
+        task = asyncio.create_task(self.rename_chat(thread, context.author.id, goal))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def rename_chat(self, thread: "Thread", user_id: int, goal: str) -> None:
+        try:
+            result = await asyncio.wait_for(
+                handler.gen_thread_info(
+                    thread_id=thread.id, user_id=user_id, message=goal
+                ),
+                timeout=THREAD_INFO_TIMEOUT,
+            )
+        except Exception:
+            logger.warning(f"thread info generation failed: {thread.id}", exc_info=True)
+            try:
+                await thread.parent.get_partial_message(thread.id).edit(
+                    content=FALLBACK_MESSAGE
+                )
+            except HTTPException as e:
+                logger.warning(f"failed to edit new chat message {thread.id}: {e}")
+            return
+        try:
+            await controller.update_new_chat(thread, result.title, result.nofication)
+        except HTTPException as e:
+            logger.warning(f"failed to rename new chat {thread.id}: {e}")
 
     @commands.Cog.listener()
     async def on_message(self, message: "Message"):
@@ -46,38 +117,82 @@ class Agent(commands.Cog, name="agent"):
         ):
             return
         logger.debug(f"message from {message.author.name}: {message.content}")
+        if not self.dispatcher.submit(channel.id, message):
+            await message.reply(
+                "이전 메시지를 처리하고 있어요. 잠시 후 다시 보내 주세요.",
+                delete_after=5,
+            )
+
+    async def respond(self, thread_id: int, messages: "list[Message]"):
+        channel = messages[-1].channel
+        author = messages[-1].author
         messenger = Messenger(
             thread=channel,
-            splitter=split_into_chunks,
+            splitter=IncrementalSplitter(),
         )
         messenger.add_content("생각 중...")
         await messenger.update_message()
-        messages = await controller.parse_message(message)
-        contents = [message.to_content() for message in messages]
-        pre_messages = handler.get_message(channel.id) + [
-            {
+        placeholder = True
+        try:
+            parsed = await asyncio.gather(
+                *(controller.parse_message(message) for message in messages)
+            )
+            contents = [data.to_content() for datas in parsed for data in datas]
+            user_message = {
                 "role": "user",
                 "content": contents,
             }
-        ]
-        result = handler.call_agent(
-            thread_id=channel.id,
-            user_id=message.author.id,
-            messages=pre_messages,
+            pre_messages = await handler.get_message(thread_id, [user_message])
+            async with handler.call_agent(
+                thread_id=thread_id,
+                user_id=author.id,
+                messages=pre_messages,
+            ) as result:
+                messenger.del_content()
+                placeholder = False
+                try:
+                    async for event in result.stream_events():
+                        self.render_event(messenger, event)
+                    raise_if_cancelled()
+                except asyncio.CancelledError:
+                    result.cancel()
+                    messenger.add_content(CANCELLED_MESSAGE)
+                    await asyncio.shield(messenger.close())
+                    raise
+        except asyncio.CancelledError:
+            # 답변을 시작하기 전에 취소돼도 "생각 중..."이 남지 않게 바꿔 둠
+            if placeholder:
+                messenger.del_content()
+                messenger.add_content(CANCELLED_MESSAGE)
+                await asyncio.shield(messenger.close())
+            raise
+        except Exception:
+            if placeholder:
+                messenger.del_content()
+            messenger.add_content(FAILED_MESSAGE)
+            await messenger.close()
+            raise
+        await messenger.close()
+        await handler.append_message(
+            thread_id,
+            [user_message] + [item.to_input_item() for item in result.new_items],
         )
-        messenger.del_content()
-        async for event in result.stream_events():
-            if event.type == "raw_response_event":
-                continue
-            elif event.type == "agent_updated_stream_event":
-                continue
-            elif event.type == "run_item_stream_event":
-                if event.item.type == "message_output_item":
-                    messenger.add_content(ItemHelpers.text_message_output(event.item))
-                elif event.item.type == "tool_call_item":
-                    messenger.add_content(event.item.raw_item.name, "tool")
-                await messenger.update_message()
-        handler.save_message(channel.id, result.to_input_list())
+
+    def render_event(self, messenger: Messenger, event: "StreamEvent"):
+        if event.type == "raw_response_event":
+            if STREAMING and isinstance(event.data, ResponseTextDeltaEvent):
+                messenger.append_content(event.data.delta)
+                messenger.schedule_update()
+        elif event.type == "run_item_stream_event":
+            if event.item.type == "message_output_item":
+                text = ItemHelpers.text_message_output(event.item)
+                if STREAMING:
+                    messenger.end_stream(text)
+                else:
+                    messenger.add_content(text)
+            elif event.item.type == "tool_call_item":
+                messenger.add_content(event.item.raw_item.name, "tool")
+            messenger.schedule_update()
 
     @commands.Cog.listener()
     async def on_command_error(self, context: "Context", error) -> None:
@@ -4,7 +4,6 @@ from discord import app_commands
 from discord.ext import commands
 
 from ..common.logger import get_logger
-from ..core.database import get_session
 from ..core.error.team import TeamBaseError
 from ..core.team import controller, handler
 from ..core.team.view import (
@@ -46,17 +45,52 @@ class Team(commands.Cog, name="team"):
     @team.command(name="start", description="새로운 팀 생성")
     @app_commands.describe(name="팀 이름")
     async def start(self, context: "Context", *, name: str) -> None:
-        with get_session() as session:
-            message_id = await controller.setup_embed(context, name)
-            team = await handler.create_team(session, message_id, name)
-            logger.info(f"created new team: {team.name} ({message_id})")
-            await handler.add_member(
-                session,
+        message_id = await controller.setup_embed(context, name)
+        team = await handler.create_team(
+            message_id, name, context.guild.id, context.channel.id
+        )
+        logger.info(f"created new team: {team.name} ({message_id})")
+        team = await handler.add_member(
+            team,
+            context.author.id,
+            context.author.name,
+        )
+        message = await controller.fetch_message(context, team)
+        await controller.send_join_alert(
+            message,
+            team,
+            context.author.id,
+        )
+        await controller.update_team_message(
+            message,
+            team,
+            JoinTeamView(team),
+        )
+        logger.info(
+            f"{context.author.name} (ID: {context.author.id}) joined the team {team.name} (ID: {team.id})."
+        )
+
+    @commands.guild_only()
+    @commands.hybrid_command(
+        name="j",
+        description="alias of /team join",
+        aliases=["ㅊ", "참", "참여", "참가"],
+    )
+    async def alias_join(self, context: "Context") -> None:
+        await self.join(context)
+
+    @commands.guild_only()
+    @team.command(name="join", description="생성된 팀에 참가")
+    async def join(self, context: "Context") -> None:
+        teams = await handler.get_team_list(context.guild.id, context.channel.id)
+        if len(teams) == 1:
+            team = teams[0]
+            team = await handler.add_member(
                 team,
                 context.author.id,
                 context.author.name,
             )
-            message = await controller.fetch_message(context, team)
+            message = await controller.fetch_message(context.channel, team)
             await controller.send_join_alert(
                 message,
                 team,
@@ -70,56 +104,19 @@ class Team(commands.Cog, name="team"):
             logger.info(
                 f"{context.author.name} (ID: {context.author.id}) joined the team {team.name} (ID: {team.id})."
             )
-
-    @commands.guild_only()
-    @commands.hybrid_command(
-        name="j",
-        description="alias of /team join",
-        aliases=["ㅊ", "참", "참여", "참가"],
-    )
-    async def alias_join(self, context: "Context") -> None:
-        await self.join(context)
-
-    @commands.guild_only()
-    @team.command(name="join", description="생성된 팀에 참가")
-    async def join(self, context: "Context") -> None:
-        with get_session() as session:
-            teams = handler.get_team_list(session)
-            if len(teams) == 1:
-                team = teams[0]
-                await handler.add_member(
-                    session,
-                    team,
-                    context.author.id,
-                    context.author.name,
-                )
-                message = await controller.fetch_message(context.channel, team)
-                await controller.send_join_alert(
-                    message,
-                    team,
-                    context.author.id,
-                )
-                await controller.update_team_message(
-                    message,
-                    team,
-                    JoinTeamView(team),
-                )
-                logger.info(
-                    f"{context.author.name} (ID: {context.author.id}) joined the team {team.name} (ID: {team.id})."
-                )
-                await context.send(
-                    f"{team.name} 팀에 참가했어요.",
-                    ephemeral=True,
-                    delete_after=3,
-                )
-            else:
-                view = TeamJoinView(teams)
-                await context.send(
-                    "참가하려는 팀을 선택해 주세요.",
-                    view=view,
-                    ephemeral=True,
-                    delete_after=10,
-                )
+            await context.send(
+                f"{team.name} 팀에 참가했어요.",
+                ephemeral=True,
+                delete_after=3,
+            )
+        else:
+            view = TeamJoinView(teams)
+            await context.send(
+                "참가하려는 팀을 선택해 주세요.",
+                view=view,
+                ephemeral=True,
+                delete_after=10,
+            )
 
     @commands.guild_only()
     @commands.hybrid_command(
@@ -133,43 +130,41 @@ class Team(commands.Cog, name="team"):
     @commands.guild_only()
     @team.command(name="cancel", description="팀 참가 취소")
     async def cancel_join(self, context: "Context") -> None:
-        with get_session() as session:
-            teams = handler.get_team_list(session)
-            if len(teams) == 1:
-                team = teams[0]
-                await handler.remove_member(
-                    session,
-                    team,
-                    context.author.id,
-                    context.author.name,
-                )
-                message = await controller.fetch_message(context.channel, team)
-                await controller.send_left_alert(
-                    message,
-                    team,
-                    context.author.id,
-                )
-                await controller.update_team_message(
-                    message,
-                    team,
-                    JoinTeamView(team),
-                )
-                logger.info(
-                    f"{context.author.name} (ID: {context.author.id}) left the team {team.name} (ID: {team.id})."
-                )
-                await context.send(
-                    f"{team.name} 팀에서 나갔어요.",
-                    ephemeral=True,
-                    delete_after=3,
-                )
-            else:
-                view = TeamLeftView(teams)
-                await context.send(
-                    "나가려는 팀을 선택해 주세요.",
-                    view=view,
-                    ephemeral=True,
-                    delete_after=10,
-                )
+        teams = await handler.get_team_list(context.guild.id, context.channel.id)
+        if len(teams) == 1:
+            team = teams[0]
+            team = await handler.remove_member(
+                team,
+                context.author.id,
+                context.author.name,
+            )
+            message = await controller.fetch_message(context.channel, team)
+            await controller.send_left_alert(
+                message,
+                team,
+                context.author.id,
+            )
+            await controller.update_team_message(
+                message,
+                team,
+                JoinTeamView(team),
+            )
+            logger.info(
+                f"{context.author.name} (ID: {context.author.id}) left the team {team.name} (ID: {team.id})."
+            )
+            await context.send(
+                f"{team.name} 팀에서 나갔어요.",
+                ephemeral=True,
+                delete_after=3,
+            )
+        else:
+            view = TeamLeftView(teams)
+            await context.send(
+                "나가려는 팀을 선택해 주세요.",
+                view=view,
+                ephemeral=True,
+                delete_after=10,
+            )
 
     @commands.guild_only()
     @commands.hybrid_command(
@@ -183,19 +178,15 @@ class Team(commands.Cog, name="team"):
     @commands.guild_only()
     @team.command(name="info", description="팀 확인")
     async def info(self, context: "Context") -> None:
-        with get_session() as session:
-            teams = handler.get_team_list(session)
-            if len(teams) == 1:
-                team = teams[0]
-                with get_session() as session:
-                    message = await controller.fetch_message(context.channel, team)
-                    await controller.show_team_detail(message, team)
-                    view = TeamControlView(team)
-                    await context.send(
-                        f"**{team.name}**팀 메뉴", view=view, ephemeral=True
-                    )
-            else:
-                await controller.show_team_list(context, teams, TeamInfoView(teams))
+        teams = await handler.get_team_list(context.guild.id, context.channel.id)
+        if len(teams) == 1:
+            team = teams[0]
+            message = await controller.fetch_message(context.channel, team)
+            await controller.show_team_detail(message, team)
+            view = TeamControlView(team)
+            await context.send(f"**{team.name}**팀 메뉴", view=view, ephemeral=True)
+        else:
+            await controller.show_team_list(context, teams, TeamInfoView(teams))
 
     @commands.guild_only()
     @commands.hybrid_command(
@@ -209,31 +200,30 @@ class Team(commands.Cog, name="team"):
     @commands.guild_only()
     @team.command(name="shuffle", description="랜덤 팀 생성")
     async def shuffle(self, context: "Context") -> None:
-        with get_session() as session:
-            teams = handler.get_team_list(session)
-            if len(teams) == 1:
-                team = teams[0]
-                message = await controller.fetch_message(context.channel, team)
-                members = team.members
-
-                team_idx = await handler.get_random_team(session, team)
-                if len(members) == 5:
-                    await controller.send_rank_team(message, team, team_idx)
-                else:
-                    await controller.send_custom_team(message, team, team_idx)
-                await context.send(
-                    f"{team.name} 팀을 섞었어요.",
-                    ephemeral=True,
-                    delete_after=3,
-                )
+        teams = await handler.get_team_list(context.guild.id, context.channel.id)
+        if len(teams) == 1:
+            team = teams[0]
+            message = await controller.fetch_message(context.channel, team)
+            members = team.members
+
+            team_idx = await handler.get_random_team(team)
+            if len(members) == 5:
+                await controller.send_rank_team(message, team, team_idx)
             else:
-                view = TeamShuffleView(teams)
-                await context.send(
-                    "참가하려는 팀을 선택해 주세요.",
-                    view=view,
-                    ephemeral=True,
-                    delete_after=10,
-                )
+                await controller.send_custom_team(message, team, team_idx)
+            await context.send(
+                f"{team.name} 팀을 섞었어요.",
+                ephemeral=True,
+                delete_after=3,
+            )
+        else:
+            view = TeamShuffleView(teams)
+            await context.send(
+                "참가하려는 팀을 선택해 주세요.",
+                view=view,
+                ephemeral=True,
+                delete_after=10,
+            )
 
     @commands.Cog.listener()
     async def on_command_error(self, context: "Context", error) -> None:
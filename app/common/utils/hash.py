@@ -3,8 +3,10 @@ import random
 import string
 
 
-def generate_key(source: str, length: int) -> str:
-    hashed_string = hashlib.sha256(source.encode()).hexdigest().upper()
+def generate_key(source: str | bytes, length: int) -> str:
+    if isinstance(source, str):
+        source = source.encode()
+    hashed_string = hashlib.sha256(source).hexdigest().upper()
     key = hashed_string[:length]
     return key
 
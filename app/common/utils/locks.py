@@ -0,0 +1,22 @@
+import asyncio
+import weakref
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class KeyedLock(Generic[K]):
+    # 키마다 asyncio.Lock을 하나씩 주고, 아무도 쓰지 않는 잠금은 자동으로 지움
+    def __init__(self):
+        self._locks: weakref.WeakValueDictionary[K, asyncio.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+
+    def __call__(self, key: K) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def __len__(self) -> int:
+        return len(self._locks)
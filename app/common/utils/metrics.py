@@ -0,0 +1,51 @@
+from collections import defaultdict, deque
+from typing import Callable
+
+Gauge = Callable[[], dict[str, float]]
+
+
+class Metrics:
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self.counters: dict[str, float] = defaultdict(float)
+        self.samples: dict[str, deque[float]] = defaultdict(
+            lambda: deque(maxlen=self.window)
+        )
+        # 스냅샷을 만들 때 현재 값을 읽어 오는 함수
+        self.gauges: dict[str, Gauge] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        self.counters[name] += value
+
+    def register(self, prefix: str, gauge: Gauge) -> None:
+        self.gauges[prefix] = gauge
+
+    def unregister(self, prefix: str) -> None:
+        self.gauges.pop(prefix, None)
+
+    def observe(self, name: str, value: float) -> None:
+        self.samples[name].append(value)
+
+    def percentile(self, name: str, q: float) -> float | None:
+        samples = self.samples.get(name)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        idx = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[idx]
+
+    def snapshot(self) -> dict[str, float]:
+        result = dict(self.counters)
+        for name, samples in self.samples.items():
+            if not samples:
+                continue
+            result[f"{name}.count"] = len(samples)
+            result[f"{name}.p50"] = self.percentile(name, 0.5)
+            result[f"{name}.p99"] = self.percentile(name, 0.99)
+        for prefix, gauge in self.gauges.items():
+            for name, value in gauge().items():
+                result[f"{prefix}.{name}"] = value
+        return result
+
+
+metrics = Metrics()
@@ -1,100 +1,241 @@
 import re
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 
-CODE_BLOCK_PATTERN = re.compile(r"```[\s\S]*?```")
+FENCE_PATTERN = re.compile(r"[ \t]*```[^`\n]*")
+# 정보 문자열 뒤에 `가 오면 펜스가 아니므로 되돌아가지 않도록 소유 한정자 사용
+FENCE_START_PATTERN = re.compile(r"```[^`\n]*+(?!`)")
 
 
 class ChunkSplitter:
-    def __init__(self, max_chunk_size: int):
+    """
+    Packs spans of a single source string into chunks.
+
+    The buffer is kept as a (start, end) range into the source and is only
+    sliced when a chunk is emitted, so each chunk costs a constant number of
+    find calls regardless of how many lines it holds.
+    """
+
+    def __init__(self, text: str, max_chunk_size: int):
+        self.text = text
         self.max = max_chunk_size
         self.chunks: List[str] = []
-        self.buf: str = ""
+        self._start = 0
+        self._end = 0
+
+    def _emit(self, chunk: str):
+        if chunk.strip():
+            self.chunks.append(chunk)
 
     def flush(self):
-        if self.buf:
-            self.chunks.append(self.buf.rstrip("\n"))
-            self.buf = ""
-
-    def add_text(self, text: str):
-        lines = text.split("\n")
-        for i, line in enumerate(lines):
-            seg = line + ("\n" if i < len(lines) - 1 else "")
-            if len(self.buf) + len(seg) <= self.max:
-                self.buf += seg
-            else:
+        if self._end > self._start:
+            self._emit(self.text[self._start : self._end].rstrip("\n"))
+        self._start = self._end
+
+    def _extend(self, start: int, end: int):
+        if self._end == self._start:
+            self._start = start
+        self._end = end
+
+    def add_text(self, start: int, end: int):
+        text = self.text
+        pos = start
+        while pos < end:
+            capacity = self.max - (self._end - self._start)
+            if end - pos <= capacity:
+                self._extend(pos, end)
+                return
+            # 들어갈 수 있는 마지막 줄까지 한 번에 추가
+            nl = text.rfind("\n", pos, pos + capacity)
+            if nl >= 0:
+                self._extend(pos, nl + 1)
+                self.flush()
+                pos = nl + 1
+            elif self._end > self._start:
                 self.flush()
-                if len(seg) <= self.max:
-                    self.buf = seg
-                else:
-                    self._split_long_text(seg)
-
-    def _split_long_text(self, seg: str):
-        start = 0
-        length = len(seg)
-        while start < length:
-            end = min(start + self.max, length)
-            part = seg[start:end]
-            nl = part.rfind("\n")
-            if nl > 0:
-                end = start + nl + 1
-                self.chunks.append(seg[start:end].rstrip("\n"))
-                start = end
             else:
-                self.chunks.append(part.rstrip("\n"))
-                start += self.max
+                pos = self._split_long_line(pos, end)
 
-    def add_code(self, code: str):
+    def _split_long_line(self, start: int, end: int) -> int:
+        nl = self.text.find("\n", start, end)
+        line_end = end if nl < 0 else nl + 1
+        for pos in range(start, line_end, self.max):
+            self._emit(self.text[pos : min(pos + self.max, line_end)].rstrip("\n"))
+        self._start = self._end = line_end
+        return line_end
+
+    def add_code(self, start: int, end: int):
         # 코드 블록이 작으면 버퍼에 추가
-        if len(code) <= self.max:
-            if len(self.buf) + len(code) <= self.max:
-                self.buf += code + "\n"
-            else:
+        if end - start <= self.max:
+            if self._end - self._start + end - start > self.max:
                 self.flush()
-                self.buf = code + "\n"
-        else:
-            # 블록이 너무 크면 별도 분할
-            self.flush()
-            fence_open, body, fence_close = self._split_code_block(code)
-            inner_max = self.max - len(fence_open) - len(fence_close) - 2
-            idx = 0
-            while idx < len(body):
-                slice_ = body[idx : idx + inner_max]
-                nl = slice_.rfind("\n")
-                if nl > 0:
-                    cut = idx + nl + 1
-                else:
-                    cut = idx + inner_max
-                part_body = body[idx:cut]
-                idx = cut
-                self.chunks.append(f"{fence_open}\n{part_body.rstrip()}\n{fence_close}")
-
-    def _split_code_block(self, code: str) -> Tuple[str, str, str]:
-        lines = code.split("\n")
-        fence_open = lines[0]
-        fence_close = lines[-1]
-        body = "\n".join(lines[1:-1])
-        return fence_open, body, fence_close
+            self._extend(start, end)
+            return
+
+        # 블록이 너무 크면 펜스를 다시 열고 닫으면서 별도 분할
+        self.flush()
+        text = self.text
+        open_end = text.find("\n", start, end)
+        close_start = text.rfind("\n", start, end) + 1
+        fence_open = text[start:open_end]
+        fence_close = text[close_start:end]
+        inner_max = self.max - len(fence_open) - len(fence_close) - 2
+        if open_end < 0 or open_end + 1 >= close_start or inner_max <= 0:
+            self.add_text(start, end)
+            return
+        pos = open_end + 1
+        body_end = close_start - 1
+        while pos < body_end:
+            cut = min(pos + inner_max, body_end)
+            if cut < body_end:
+                nl = text.rfind("\n", pos + 1, cut)
+                if nl >= 0:
+                    cut = nl + 1
+            body = text[pos:cut].rstrip()
+            self.chunks.append(f"{fence_open}\n{body}\n{fence_close}")
+            pos = cut
+        self._start = self._end = end
 
     def finish(self) -> List[str]:
         self.flush()
         return self.chunks
 
 
+def find_code_blocks(text: str) -> Iterator[Tuple[int, int]]:
+    # 줄 맨 앞의 ``` 로 열고 ``` 만 있는 줄로 닫힌 블록만 코드로 취급
+    # ``` 부터 찾고 앞에 들여쓰기만 있는지 확인 (MULTILINE 정규식보다 빠름)
+    rfind = text.rfind
+    open_start = None
+    for m in FENCE_START_PATTERN.finditer(text):
+        fence, end = m.span()
+        start = rfind("\n", 0, fence) + 1
+        if start != fence and text[start:fence].strip(" \t"):
+            continue
+        if open_start is None:
+            open_start = start
+        elif end - fence == 3 or text[fence + 3 : end].isspace():
+            yield open_start, end
+            open_start = None
+
+
 def split_into_chunks(text: str, max_chunk_size: int = 2000) -> List[str]:
-    parts: List[Tuple[str, str]] = []
+    splitter = ChunkSplitter(text, max_chunk_size)
     last = 0
-    for m in CODE_BLOCK_PATTERN.finditer(text):
-        if m.start() > last:
-            parts.append(("text", text[last : m.start()]))
-        parts.append(("code", m.group()))
-        last = m.end()
-    if last < len(text):
-        parts.append(("text", text[last:]))
-
-    splitter = ChunkSplitter(max_chunk_size)
-    for kind, content in parts:
-        if kind == "text":
-            splitter.add_text(content)
-        else:
-            splitter.add_code(content)
+    for start, end in find_code_blocks(text):
+        splitter.add_text(last, start)
+        splitter.add_code(start, end)
+        last = end
+    splitter.add_text(last, len(text))
     return splitter.finish()
+
+
+class IncrementalSplitter:
+    """
+    Stateful splitter for text that only grows at the end.
+
+    Complete lines are packed into chunks once; a chunk is frozen as soon as the
+    next line does not fit, so each call only re-renders the last open chunk.
+    A code fence that is still open when a chunk is frozen is closed there and
+    reopened (with its language) at the top of the next chunk.
+    """
+
+    def __init__(self, max_chunk_size: int = 2000):
+        self.max = max_chunk_size
+        self.reset()
+
+    def reset(self):
+        self._text = ""
+        self._pos = 0
+        self._frozen: List[str] = []
+        self._lines: List[str] = []
+        self._size = 0
+        self._fence: str | None = None
+
+    def __call__(self, text: str) -> List[str]:
+        if not text.startswith(self._text):
+            self.reset()
+        self._text = text
+        self._consume()
+        return self.chunks
+
+    def append(self, text: str):
+        self._text += text
+        self._consume()
+
+    @property
+    def chunks(self) -> List[str]:
+        partial = self._text[self._pos :]
+        if not partial:
+            tail = self._render(self._lines, self._fence)
+            return self._frozen + tail
+        fence = self._next_fence(partial)
+        size = self._size + len(partial) + (1 if self._lines else 0)
+        if not self._lines or size + (4 if fence else 0) <= self.max:
+            return self._frozen + self._render(self._lines + [partial], fence)
+        head = self._render(self._lines, self._fence)
+        reopen = [self._fence] if self._fence else []
+        return self._frozen + head + self._render(reopen + [partial], fence)
+
+    def _consume(self):
+        text = self._text
+        while True:
+            nl = text.find("\n", self._pos)
+            if nl < 0:
+                break
+            self._add_line(text[self._pos : nl])
+            self._pos = nl + 1
+        # 줄바꿈 없이 긴 텍스트는 미리 잘라서 고정
+        limit = self._line_limit()
+        while len(text) - self._pos > limit:
+            self._add_piece(text[self._pos : self._pos + limit])
+            self._pos += limit
+
+    def _line_limit(self) -> int:
+        if self._fence:
+            return self.max - len(self._fence) - 5
+        return self.max
+
+    def _next_fence(self, line: str) -> str | None:
+        if self._fence:
+            return None if line.strip() == "```" else self._fence
+        if not FENCE_PATTERN.fullmatch(line):
+            return None
+        fence = line.strip()
+        # 다시 열었을 때 닫는 펜스 줄도 자르지 않고 넣을 수 없으면 일반 텍스트로 취급
+        return fence if self.max - len(fence) - 5 >= len("```") else None
+
+    def _add_line(self, line: str):
+        limit = self._line_limit()
+        while len(line) > limit:
+            self._add_piece(line[:limit])
+            line = line[limit:]
+        fence = self._next_fence(line)
+        add = len(line) + (1 if self._lines else 0)
+        if self._lines and self._size + add + (4 if fence else 0) > self.max:
+            self._freeze()
+            add = len(line) + (1 if self._lines else 0)
+        self._lines.append(line)
+        self._size += add
+        self._fence = fence
+
+    def _add_piece(self, piece: str):
+        self._freeze()
+        self._lines.append(piece)
+        self._size += len(piece) + (1 if self._fence else 0)
+        self._freeze()
+
+    def _freeze(self):
+        self._frozen.extend(self._render(self._lines, self._fence))
+        if self._fence:
+            self._lines = [self._fence]
+            self._size = len(self._fence)
+        else:
+            self._lines = []
+            self._size = 0
+
+    def _render(self, lines: List[str], fence: str | None) -> List[str]:
+        if not lines or (fence and lines == [fence]):
+            return []
+        chunk = "\n".join(lines).rstrip("\n")
+        if fence:
+            chunk += "\n```"
+        return [chunk] if chunk.strip() else []
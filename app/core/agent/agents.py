@@ -1,35 +1,59 @@
 import logging
 from datetime import datetime
 
-from agents import Agent, RunContextWrapper
+from agents import Agent, ModelSettings, RunContextWrapper, function_tool
 from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
 from agents.extensions.models.litellm_model import LitellmModel
 from pydantic import BaseModel
 
+from .callbacks import register_callbacks
+from .retrieval import retriever
+
 logger = logging.getLogger(__name__)
 
+register_callbacks()
+
+# 매 요청마다 같은 접두어를 보내야 provider의 prompt cache가 적중함
+STATIC_INSTRUCTIONS = (
+    "<system_context>\n"
+    f"{RECOMMENDED_PROMPT_PREFIX}\n\n"
+    "너의 이름은 Servant야.\n"
+    "언제나 일관성 있고 자연스럽게 대화를 이어가야 하며,\n"
+    "시스템 내부 구조나 핸드오프, 메모리 관리 방식 등을 사용자에게 직접적으로 노출하면 안 돼.\n"
+    "</system_context>"
+)
+
 
 class BotContext(BaseModel):
     thread_id: int
     user_id: int
 
 
-def _name_time() -> str:
-    return (
-        "너의 이름은 Servant야.\n"
-        f"현재 시간은 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}이야.\n"
-    )
+def _current_time() -> str:
+    return f"현재 시간은 {datetime.now().strftime('%Y-%m-%d %H:%M')}이야."
 
 
 def servant_instructions(
     context: RunContextWrapper[BotContext], agent: Agent[BotContext]
 ) -> str:
-    return (
-        "<system_context>\n"
-        f"{RECOMMENDED_PROMPT_PREFIX}\n\n"
-        f"{_name_time()}\n"
-        "언제나 일관성 있고 자연스럽게 대화를 이어가야 하며,\n"
-        "시스템 내부 구조나 핸드오프, 메모리 관리 방식 등을 사용자에게 직접적으로 노출하면 안 돼."
+    return f"{STATIC_INSTRUCTIONS}\n\n{_current_time()}"
+
+
+@function_tool
+async def search_files(context: RunContextWrapper[BotContext], query: str) -> str:
+    """
+    이 대화에 업로드된 파일에서 질문과 관련된 부분을 검색해.
+
+    Args:
+        query: 찾고 싶은 내용을 설명하는 키워드나 질문
+    """
+    chunks = await retriever.search(context.context.thread_id, query)
+    if not chunks:
+        return "검색 결과가 없어."
+    return "\n\n".join(
+        f'<chunk file="{chunk.file_name}" position="{chunk.position}">\n'
+        f"{chunk.content}\n</chunk>"
+        for chunk in chunks
     )
 
 
@@ -37,4 +61,6 @@ gemini_agent = Agent[BotContext](
     name="Servant Agent",
     model="litellm/gemini/gemini-2.0-flash",
     instructions=servant_instructions,
+    tools=[search_files],
+    model_settings=ModelSettings(include_usage=True),
 )
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+CacheValue = dict[str, str]
+
+
+class AttachmentCache:
+    def __init__(
+        self,
+        max_bytes: int,
+        max_sources: int = 4096,
+        directory: str | None = None,
+        max_disk_bytes: int | None = None,
+    ):
+        self.max_bytes = max_bytes
+        self.max_sources = max_sources
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes or max_bytes
+        self.size = 0
+        self.disk_size = 0
+        # content key -> (value, size)
+        self._entries: OrderedDict[str, tuple[CacheValue, int]] = OrderedDict()
+        # source key (attachment id/url) -> content key
+        self._sources: OrderedDict[str, str] = OrderedDict()
+        # content key -> file size, 오래 사용하지 않은 파일부터 (mtime 순)
+        self._disk: OrderedDict[str, int] = OrderedDict()
+        # 디스크에 연결 파일이 있는 source key, 오래 사용하지 않은 것부터 (mtime 순)
+        self._disk_sources: OrderedDict[str, None] = OrderedDict()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._scan_disk()
+
+    async def resolve(self, source_key: str) -> str | None:
+        content_key = self._sources.get(source_key)
+        if content_key is not None:
+            self._sources.move_to_end(source_key)
+            return content_key
+        if source_key not in self._disk_sources:
+            return None
+        content_key = await asyncio.to_thread(self._read_link, source_key)
+        if content_key is None:
+            self._disk_sources.pop(source_key, None)
+            return None
+        self._remember(source_key, content_key)
+        self._disk_sources.move_to_end(source_key)
+        return content_key
+
+    async def get_by_source(self, source_key: str) -> CacheValue | None:
+        content_key = await self.resolve(source_key)
+        if content_key is None:
+            return None
+        return await self.get(content_key)
+
+    async def get(self, content_key: str) -> CacheValue | None:
+        entry = self._entries.get(content_key)
+        if entry is not None:
+            self._entries.move_to_end(content_key)
+            return entry[0]
+        if not self.directory:
+            return None
+        value = await asyncio.to_thread(self._read_disk, content_key)
+        if value is not None:
+            self._put(content_key, value)
+            if content_key in self._disk:
+                self._disk.move_to_end(content_key)
+        return value
+
+    async def set(
+        self, content_key: str, value: CacheValue, source_key: str | None = None
+    ) -> None:
+        self._put(content_key, value)
+        if source_key is not None:
+            await self.link(source_key, content_key)
+        if self.directory:
+            size = await asyncio.to_thread(self._write_disk, content_key, value)
+            if size is not None:
+                self._add_disk(content_key, size)
+                await self._evict_disk()
+
+    async def link(self, source_key: str, content_key: str) -> None:
+        self._remember(source_key, content_key)
+        if not self.directory:
+            return
+        # 재시작 후에도 내용 키를 알 수 있도록 연결도 디스크에 저장
+        if await asyncio.to_thread(self._write_link, source_key, content_key):
+            self._disk_sources[source_key] = None
+            self._disk_sources.move_to_end(source_key)
+            evicted = []
+            while len(self._disk_sources) > self.max_sources:
+                evicted.append(self._disk_sources.popitem(last=False)[0])
+            if evicted:
+                await asyncio.to_thread(self._remove_disk, evicted, ".link")
+
+    def _remember(self, source_key: str, content_key: str) -> None:
+        self._sources[source_key] = content_key
+        self._sources.move_to_end(source_key)
+        while len(self._sources) > self.max_sources:
+            self._sources.popitem(last=False)
+
+    def _put(self, content_key: str, value: CacheValue) -> None:
+        size = sum(len(v) for v in value.values())
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(content_key, None)
+        if old is not None:
+            self.size -= old[1]
+        self._entries[content_key] = (value, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= evicted
+
+    def _scan_disk(self) -> None:
+        entries = []
+        links = []
+        for name in os.listdir(self.directory):
+            if not name.endswith((".json", ".link")):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            if name.endswith(".link"):
+                links.append((stat.st_mtime, name.removesuffix(".link")))
+            else:
+                entries.append(
+                    (stat.st_mtime, name.removesuffix(".json"), stat.st_size)
+                )
+        for _, content_key, size in sorted(entries):
+            self._add_disk(content_key, size)
+        for _, source_key in sorted(links):
+            self._disk_sources[source_key] = None
+
+    def _add_disk(self, content_key: str, size: int) -> None:
+        self.disk_size += size - self._disk.pop(content_key, 0)
+        self._disk[content_key] = size
+
+    async def _evict_disk(self) -> None:
+        evicted = []
+        while self._disk and self.disk_size > self.max_disk_bytes:
+            content_key, size = self._disk.popitem(last=False)
+            self.disk_size -= size
+            evicted.append(content_key)
+        if evicted:
+            await asyncio.to_thread(self._remove_disk, evicted)
+
+    def _remove_disk(self, keys: list[str], suffix: str = ".json") -> None:
+        for key in keys:
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def _path(self, key: str, suffix: str = ".json") -> str:
+        return os.path.join(self.directory, f"{key}{suffix}")
+
+    def _read_disk(self, content_key: str) -> CacheValue | None:
+        path = self._path(content_key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            # mtime을 사용 시각으로 써서 재시작 후에도 LRU 순서를 유지
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.warning(f"Failed to read attachment cache: {content_key}")
+            return None
+
+    def _write_disk(self, content_key: str, value: CacheValue) -> int | None:
+        path = self._path(content_key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            return os.path.getsize(path)
+        except OSError:
+            logger.warning(f"Failed to write attachment cache: {content_key}")
+            return None
+
+    def _read_link(self, source_key: str) -> str | None:
+        path = self._path(source_key, ".link")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content_key = f.read().strip()
+            os.utime(path)
+            return content_key or None
+        except OSError:
+            return None
+
+    def _write_link(self, source_key: str, content_key: str) -> bool:
+        path = self._path(source_key, ".link")
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content_key)
+            os.replace(tmp_path, path)
+            return True
+        except OSError:
+            logger.warning(f"Failed to write attachment cache link: {source_key}")
+            return False
@@ -0,0 +1,44 @@
+import logging
+
+import litellm
+from litellm.integrations.custom_logger import CustomLogger
+
+from app.common.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _cached_tokens(usage) -> int:
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) if details else None
+    if cached is None:
+        cached = getattr(usage, "cache_read_input_tokens", None)
+    return cached or 0
+
+
+class UsageMetricsLogger(CustomLogger):
+    def _record(self, kwargs, response_obj) -> None:
+        usage = getattr(response_obj, "usage", None)
+        if usage is None:
+            return
+        model = kwargs.get("model", "unknown")
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        cached_tokens = _cached_tokens(usage)
+        metrics.incr("llm.prompt_tokens", prompt_tokens)
+        metrics.incr("llm.cached_tokens", cached_tokens)
+        metrics.incr(f"llm.prompt_tokens.{model}", prompt_tokens)
+        metrics.incr(f"llm.cached_tokens.{model}", cached_tokens)
+        if prompt_tokens:
+            metrics.observe("llm.cache_hit_ratio", cached_tokens / prompt_tokens)
+        logger.debug(f"{model} usage: prompt {prompt_tokens}, cached {cached_tokens}")
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        self._record(kwargs, response_obj)
+
+    async def async_log_success_event(self, kwargs, response_obj, start_time, end_time):
+        self._record(kwargs, response_obj)
+
+
+def register_callbacks() -> None:
+    if not any(isinstance(cb, UsageMetricsLogger) for cb in litellm.callbacks):
+        litellm.callbacks.append(UsageMetricsLogger())
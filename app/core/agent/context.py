@@ -0,0 +1,82 @@
+import logging
+from collections import OrderedDict
+
+from agents import TResponseInputItem
+
+from .tokens import Tokenizer, count_item_tokens, tokenizer
+
+logger = logging.getLogger(__name__)
+
+
+def group_items(items: list[TResponseInputItem]) -> list[list[TResponseInputItem]]:
+    # tool 호출과 결과가 분리되지 않도록 하나의 그룹으로 묶음
+    groups: list[list[TResponseInputItem]] = []
+    call_groups: dict[str, int] = {}
+    for item in items:
+        item_type = item.get("type")
+        if item_type == "function_call_output" and item.get("call_id") in call_groups:
+            start = call_groups[item["call_id"]]
+            merged = [i for group in groups[start:] for i in group]
+            del groups[start:]
+            groups.append(merged + [item])
+            continue
+        if item_type == "function_call":
+            call_groups[item.get("call_id")] = len(groups)
+        groups.append([item])
+    return groups
+
+
+class ContextBuilder:
+    def __init__(
+        self,
+        max_tokens: int,
+        tokenize: Tokenizer = tokenizer,
+        max_threads: int = 1000,
+    ):
+        self.max_tokens = max_tokens
+        self.tokenize = tokenize
+        self.max_threads = max_threads
+        # thread_id -> {id(item): (item, 토큰 수)}, 마지막 build에서 센 항목만 보관
+        # 기록 항목은 턴이 바뀌어도 같은 객체이므로 내용을 다시 읽지 않고 id로 찾음
+        # 항목도 함께 보관해서 id가 재사용된 다른 객체와 구분
+        self._counts: OrderedDict[
+            int, dict[int, tuple[TResponseInputItem, int]]
+        ] = OrderedDict()
+
+    def build(
+        self,
+        history: list[TResponseInputItem],
+        pending: list[TResponseInputItem],
+        pinned: list[TResponseInputItem] | None = None,
+        thread_id: int | None = None,
+    ) -> list[TResponseInputItem]:
+        pinned = pinned or []
+        previous = self._counts.pop(thread_id, {})
+        current: dict[int, tuple[TResponseInputItem, int]] = {}
+
+        def count(item: TResponseInputItem) -> int:
+            entry = previous.get(id(item))
+            if entry is not None and entry[0] is item:
+                tokens = entry[1]
+            else:
+                tokens = count_item_tokens(item, self.tokenize)
+            current[id(item)] = (item, tokens)
+            return tokens
+
+        # 고정 항목과 새 메시지는 예산과 관계없이 항상 포함
+        budget = self.max_tokens - sum(count(item) for item in pinned + pending)
+        selected: list[list[TResponseInputItem]] = []
+        for group in reversed(group_items(history)):
+            tokens = sum(count(item) for item in group)
+            if tokens > budget:
+                break
+            budget -= tokens
+            selected.append(group)
+        if thread_id is not None:
+            self._counts[thread_id] = current
+            while len(self._counts) > self.max_threads:
+                self._counts.popitem(last=False)
+        window = [item for group in reversed(selected) for item in group]
+        if len(window) < len(history):
+            logger.debug(f"context trimmed: {len(history)} -> {len(window)} items")
+        return pinned + window + pending
@@ -1,20 +1,62 @@
+import asyncio
 import base64
+import codecs
+import hashlib
 import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
-from typing import TYPE_CHECKING
+from io import BytesIO
+from typing import TYPE_CHECKING, Callable
 
-import requests
+from PIL import Image, ImageOps, UnidentifiedImageError
 
+from app.common.utils.hash import generate_key
 from app.common.utils.text_splitter import split_into_chunks
 
+from .cache import AttachmentCache
+from .download import DownloadError, download, iter_download
+from .retrieval import retriever
+
 if TYPE_CHECKING:
     from discord import Attachment, Message, Thread
     from discord.ext.commands import Context
 
+    from .retrieval import DocumentWriter
+
 
 logger = logging.getLogger(__name__)
 
+ATTACHMENT_MAX_BYTES = int(os.getenv("ATTACHMENT_MAX_BYTES", str(20 * 1024 * 1024)))
+ATTACHMENT_CONCURRENCY = int(os.getenv("ATTACHMENT_CONCURRENCY", "4"))
+
+TEXT_MAX_BYTES = int(os.getenv("TEXT_ATTACHMENT_MAX_BYTES", str(50 * 1024 * 1024)))
+TEXT_INLINE_CHARS = int(os.getenv("TEXT_ATTACHMENT_INLINE_CHARS", "32000"))
+TEXT_TAIL_RATIO = 0.25
+
+IMAGE_MAX_SIZE = int(os.getenv("IMAGE_MAX_SIZE", "1568"))
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "WEBP").upper()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+IMAGE_MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+}
+
+attachment_cache = AttachmentCache(
+    max_bytes=int(os.getenv("ATTACHMENT_CACHE_MAX_BYTES", str(128 * 1024 * 1024))),
+    directory=os.getenv("ATTACHMENT_CACHE_DIR") or None,
+    max_disk_bytes=int(os.getenv("ATTACHMENT_CACHE_DISK_MAX_BYTES", "0")) or None,
+)
+
+_image_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("IMAGE_WORKERS", "2")),
+    thread_name_prefix="image",
+)
+
 
 class MessageType(Enum):
     TEXT = "text"
@@ -25,6 +67,7 @@ class MessageType(Enum):
 class MessageData:
     type: MessageType
     content: str
+    mime_type: str = "image/jpeg"
 
     def to_content(self) -> dict[str, str]:
         if self.type == MessageType.TEXT:
@@ -32,9 +75,24 @@ class MessageData:
         elif self.type == MessageType.IMAGE:
             return {
                 "type": "input_image",
-                "image_url": f"data:image/jpeg;base64,{self.content}",
+                "image_url": f"data:{self.mime_type};base64,{self.content}",
             }
 
+    def to_dict(self) -> dict[str, str]:
+        return {
+            "type": self.type.value,
+            "content": self.content,
+            "mime_type": self.mime_type,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, str]) -> "MessageData":
+        return cls(
+            type=MessageType(data["type"]),
+            content=data["content"],
+            mime_type=data["mime_type"],
+        )
+
 
 async def setup_new_chat(
     context: "Context", title: str, message_content: str
@@ -44,40 +102,283 @@ async def setup_new_chat(
     return thread
 
 
+async def update_new_chat(thread: "Thread", title: str, message_content: str) -> None:
+    # 메시지에서 만든 스레드는 시작 메시지와 id가 같음
+    starter = thread.parent.get_partial_message(thread.id)
+    await asyncio.gather(
+        thread.edit(name=title),
+        starter.edit(content=message_content),
+    )
+
+
+def _preprocess_image(raw_content: bytes) -> tuple[str, str]:
+    with Image.open(BytesIO(raw_content)) as image:
+        source_format = image.format
+        if (
+            max(image.size) <= IMAGE_MAX_SIZE
+            and source_format in ("JPEG", "WEBP")
+            and not getattr(image, "is_animated", False)
+        ):
+            # 이미 충분히 작은 압축 포맷이면 재인코딩하지 않음
+            encoded = base64.b64encode(raw_content).decode("utf-8")
+            return encoded, IMAGE_MIME_TYPES[source_format]
+
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((IMAGE_MAX_SIZE, IMAGE_MAX_SIZE))
+        if IMAGE_FORMAT == "JPEG" and image.mode != "RGB":
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background.paste(image, mask=image.getchannel("A"))
+            else:
+                background.paste(image.convert("RGB"))
+            image = background
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        buffer = BytesIO()
+        image.save(buffer, format=IMAGE_FORMAT, quality=IMAGE_QUALITY)
+        processed = buffer.getvalue()
+
+    if len(processed) >= len(raw_content) and source_format in IMAGE_MIME_TYPES:
+        encoded = base64.b64encode(raw_content).decode("utf-8")
+        return encoded, IMAGE_MIME_TYPES[source_format]
+    encoded = base64.b64encode(processed).decode("utf-8")
+    return encoded, IMAGE_MIME_TYPES[IMAGE_FORMAT]
+
+
+async def preprocess_image(raw_content: bytes) -> MessageData | None:
+    loop = asyncio.get_running_loop()
+    try:
+        encoded, mime_type = await loop.run_in_executor(
+            _image_executor, _preprocess_image, raw_content
+        )
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        logger.warning(f"Failed to process image: {e}")
+        return None
+    return MessageData(type=MessageType.IMAGE, content=encoded, mime_type=mime_type)
+
+
+def _is_text_type(content_type: str) -> bool:
+    return (
+        content_type.startswith("text/")
+        or content_type == "application/json"
+        or content_type == "application/xml"
+    )
+
+
+async def _read_text(
+    url: str, sink: Callable[[str], None] | None = None
+) -> tuple[str, int, int, str]:
+    """
+    Stream a text file and keep only a head and tail excerpt in memory.
+
+    Every decoded piece is also passed to `sink` when given. Returns the text
+    (whole file or excerpt), the total size in bytes, the number of
+    characters left out of the excerpt and the SHA-256 of the raw bytes.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    tail_limit = int(TEXT_INLINE_CHARS * TEXT_TAIL_RATIO)
+    head_limit = TEXT_INLINE_CHARS - tail_limit
+    head: list[str] = []
+    head_size = 0
+    tail: deque[str] = deque()
+    tail_size = 0
+    total = 0
+    omitted = 0
+    hasher = hashlib.sha256()
+
+    def add(text: str):
+        nonlocal head_size, tail_size, omitted
+        if sink is not None:
+            sink(text)
+        if head_size < head_limit:
+            taken = text[: head_limit - head_size]
+            head.append(taken)
+            head_size += len(taken)
+            text = text[len(taken) :]
+        if not text:
+            return
+        tail.append(text)
+        tail_size += len(text)
+        while tail_size - len(tail[0]) >= tail_limit:
+            dropped = tail.popleft()
+            tail_size -= len(dropped)
+            omitted += len(dropped)
+
+    async for chunk in iter_download(url, TEXT_MAX_BYTES):
+        total += len(chunk)
+        hasher.update(chunk)
+        add(decoder.decode(chunk))
+    add(decoder.decode(b"", final=True))
+
+    tail_text = "".join(tail)
+    if omitted == 0 and head_size + len(tail_text) <= TEXT_INLINE_CHARS:
+        text = "".join(head) + tail_text
+    else:
+        cut = len(tail_text) - tail_limit
+        omitted += cut
+        text = (
+            "".join(head)
+            + f"\n... ({omitted} characters omitted) ...\n"
+            + tail_text[cut:]
+        )
+    # generate_key와 같은 형식
+    return text, total, omitted, hasher.hexdigest().upper()
+
+
 async def _parse_attachment(
-    attachment: "Attachment",
+    attachment: "Attachment", thread_id: int
 ) -> MessageData | None:
-    if attachment.content_type.startswith("image/"):
-        try:
-            response = requests.get(attachment.url)
-            response.raise_for_status()
-        except Exception:
-            logger.warning(f"Failed to download image: {attachment.url}")
-            return None
-        b64_bytes = base64.b64encode(response.content)
-        return MessageData(type=MessageType.IMAGE, content=b64_bytes.decode("utf-8"))
-    elif (
-        attachment.content_type.startswith("text/")
-        or attachment.content_type == "application/json"
-        or attachment.content_type == "application/xml"
-    ):
-        file_name = attachment.filename
-        raw_content = await attachment.read()
-        file_content = raw_content.decode("utf-8")
-        content = f"<file name={file_name}>\n{file_content}\n</file>"
-        return MessageData(type=MessageType.TEXT, content=content)
+    content_type = attachment.content_type or ""
+    file_name = attachment.filename
+    if content_type.startswith("image/"):
+        max_bytes = ATTACHMENT_MAX_BYTES
+    elif _is_text_type(content_type):
+        max_bytes = TEXT_MAX_BYTES
     else:
-        file_type = attachment.content_type
-        file_name = attachment.filename
-        logger.warning(f"Unsupported file type: {file_type} for file: {file_name}")
+        logger.warning(f"Unsupported file type: {content_type} for file: {file_name}")
+        return None
+    if attachment.size > max_bytes:
+        logger.warning(f"Attachment is too large: {file_name} ({attachment.size})")
+        return None
+
+    source_key = generate_key(f"{attachment.id}:{attachment.url}", 64)
+    if content_type.startswith("image/"):
+        return await _parse_image(attachment, source_key)
+    return await _parse_text(attachment, source_key, thread_id)
+
+
+async def _parse_image(attachment: "Attachment", source_key: str) -> MessageData | None:
+    if cached := await attachment_cache.get_by_source(source_key):
+        return MessageData.from_dict(cached)
+    try:
+        raw_content = await download(attachment.url, ATTACHMENT_MAX_BYTES)
+    except DownloadError as e:
+        logger.warning(f"Failed to download image: {e}")
         return None
+    content_key = generate_key(raw_content, 64)
+    if cached := await attachment_cache.get(content_key):
+        await attachment_cache.link(source_key, content_key)
+        return MessageData.from_dict(cached)
+    data = await preprocess_image(raw_content)
+    if data is not None:
+        await attachment_cache.set(content_key, data.to_dict(), source_key)
+    return data
+
+
+async def _close_writer(writer: "DocumentWriter", content_hash: str) -> int:
+    # 색인 저장에 실패해도 발췌본만으로 답변할 수 있음
+    try:
+        return await writer.close(content_hash)
+    except Exception:
+        logger.exception(f"Failed to index file: {writer.file_name}")
+        return 0
+
+
+async def _hash_download(url: str) -> str:
+    hasher = hashlib.sha256()
+    async for chunk in iter_download(url, TEXT_MAX_BYTES):
+        hasher.update(chunk)
+    return hasher.hexdigest().upper()
+
+
+def _text_message(file_name: str, value: dict[str, str], indexed: bool) -> MessageData:
+    content = value["content"]
+    if indexed:
+        content += (
+            f"\n{file_name} 파일은 일부만 표시했어. "
+            "전체 내용이 필요하면 search_files 도구로 검색해."
+        )
+    return MessageData(type=MessageType.TEXT, content=content)
+
+
+async def _parse_text(
+    attachment: "Attachment", source_key: str, thread_id: int
+) -> MessageData | None:
+    # Discord는 같은 파일을 다시 올려도 새 id와 URL을 주므로 이름과 크기로 후보를 찾고
+    # 내용이 같은지는 해시로 확인
+    probe_key = generate_key(f"{attachment.filename}:{attachment.size}", 64)
+    try:
+        if data := await _reuse_text(attachment, source_key, probe_key, thread_id):
+            return data
+        return await _read_text_attachment(attachment, source_key, probe_key, thread_id)
+    except DownloadError as e:
+        logger.warning(f"Failed to download file: {e}")
+        return None
+
+
+async def _reuse_text(
+    attachment: "Attachment", source_key: str, probe_key: str, thread_id: int
+) -> MessageData | None:
+    content_key = await attachment_cache.resolve(source_key)
+    verified = content_key is not None
+    if not verified:
+        content_key = await attachment_cache.resolve(probe_key)
+    if content_key is None:
+        return None
+    cached = await attachment_cache.get(content_key)
+    if cached is None:
+        return None
+    # 발췌본에서 빠진 내용이 이 스레드에 색인돼 있지 않으면 다시 읽어서 색인
+    indexed = int(cached.get("omitted", "0")) > 0
+    if indexed and not await retriever.has(thread_id, attachment.filename, content_key):
+        return None
+    if not verified:
+        # 다운로드는 피할 수 없지만 디코딩, 발췌, 색인은 건너뜀
+        if await _hash_download(attachment.url) != content_key:
+            return None
+        await attachment_cache.link(source_key, content_key)
+    return _text_message(attachment.filename, cached, indexed)
+
+
+async def _read_text_attachment(
+    attachment: "Attachment", source_key: str, probe_key: str, thread_id: int
+) -> MessageData:
+    file_name = attachment.filename
+    # 발췌본에서 빠진 내용이 있으면 스레드 검색 색인에 넣고 search_files 도구로 찾게 함
+    # 글자 수는 바이트 수를 넘지 않으므로 작은 파일은 색인 준비를 건너뜀
+    writer = None
+    if attachment.size > TEXT_INLINE_CHARS:
+        writer = retriever.writer(thread_id, file_name)
+    try:
+        text, size, omitted, content_key = await _read_text(
+            attachment.url, writer.feed if writer else None
+        )
+        indexed = (
+            writer is not None
+            and omitted > 0
+            and await _close_writer(writer, content_key) > 0
+        )
+    finally:
+        # 색인하지 않았거나 다운로드가 실패했으면 모아 둔 청크를 버림
+        if writer is not None:
+            writer.discard()
+    content = f"<file name={file_name} size={size}>\n{text}\n</file>"
+    # 색인 여부는 스레드마다 다르므로 안내 문구를 뺀 발췌본만 내용 단위로 캐시
+    value = MessageData(type=MessageType.TEXT, content=content).to_dict()
+    value["omitted"] = str(omitted)
+    await attachment_cache.set(content_key, value, source_key)
+    await attachment_cache.link(probe_key, content_key)
+    return _text_message(file_name, value, indexed)
 
 
 async def parse_message(message: "Message"):
-    messages: list[MessageData] = []
-    for attachment in message.attachments or ():
-        if parsed := await _parse_attachment(attachment):
-            messages.append(parsed)
+    semaphore = asyncio.Semaphore(ATTACHMENT_CONCURRENCY)
+
+    async def parse(attachment: "Attachment") -> MessageData | None:
+        async with semaphore:
+            # 첨부 파일 하나가 실패해도 나머지와 답변은 계속 처리
+            try:
+                return await _parse_attachment(attachment, message.channel.id)
+            except Exception:
+                logger.exception(f"Failed to parse attachment: {attachment.filename}")
+                return None
+
+    parsed = await asyncio.gather(
+        *(parse(attachment) for attachment in message.attachments or ())
+    )
+    messages = [data for data in parsed if data is not None]
     if message.content:
         messages.append(MessageData(type=MessageType.TEXT, content=message.content))
     return messages
@@ -0,0 +1,67 @@
+import logging
+import os
+from typing import AsyncIterator
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_TIMEOUT = float(os.getenv("ATTACHMENT_TIMEOUT", "30"))
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+_session: aiohttp.ClientSession | None = None
+
+
+class DownloadError(Exception):
+    def __init__(self, url: str, message: str):
+        super().__init__(message)
+        self.url = url
+        self.message = message
+
+    def __str__(self):
+        return f"{self.__class__.__name__}: {self.message} ({self.url})"
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT),
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+        )
+    return _session
+
+
+async def close_http_session() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def iter_download(url: str, max_bytes: int) -> AsyncIterator[bytes]:
+    session = get_http_session()
+    try:
+        async with session.get(url) as response:
+            response.raise_for_status()
+            if response.content_length and response.content_length > max_bytes:
+                raise DownloadError(
+                    url, f"file is too large: {response.content_length}"
+                )
+            received = 0
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                received += len(chunk)
+                if received > max_bytes:
+                    raise DownloadError(url, f"file is larger than {max_bytes} bytes")
+                yield chunk
+    except TimeoutError as e:
+        raise DownloadError(url, "download timed out") from e
+    except aiohttp.ClientError as e:
+        raise DownloadError(url, str(e)) from e
+
+
+async def download(url: str, max_bytes: int) -> bytes:
+    buffer = bytearray()
+    async for chunk in iter_download(url, max_bytes):
+        buffer += chunk
+    return bytes(buffer)
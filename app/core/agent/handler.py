@@ -1,17 +1,49 @@
+import asyncio
 import logging
-from typing import TYPE_CHECKING
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator
 
-from agents import Runner, TResponseInputItem
+from agents import RunResult, TResponseInputItem
 from pydantic import BaseModel
 
+from app.common.utils.locks import KeyedLock
+from app.common.utils.ttl_cache import TTLCache
 from app.core.agent.agents import BotContext, gemini_agent
+from app.core.agent.context import ContextBuilder
+from app.core.agent.limiter import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_CONVERSATION,
+    PRIORITY_IDLE,
+    AdmissionController,
+)
+from app.core.agent.router import RoutedRun, router
+from app.core.agent.store import create_store, trim_history
+from app.core.agent.summary import Summarizer, is_summary_item
+from app.core.agent.tokens import approximate_tokens, count_tokens
 
 if TYPE_CHECKING:
     from .controller import MessageData
 
 logger = logging.getLogger(__name__)
 
-message_db: dict[int, list[TResponseInputItem]] = {}
+message_store = create_store()
+# 기록을 읽고 다시 쓰는 작업(메시지 추가, 요약 적용)은 스레드마다 하나씩만 실행
+history_lock = KeyedLock[int]()
+
+context_builder = ContextBuilder(
+    max_tokens=int(os.getenv("AGENT_CONTEXT_TOKENS", "32000")),
+    max_threads=int(os.getenv("AGENT_HISTORY_MAX_THREADS", "1000")),
+)
+
+admission = AdmissionController(
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60")),
+    tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000")),
+)
+
+summarizer = Summarizer(message_store, admission, history_lock)
 
 
 class ThreadInfo(BaseModel):
@@ -19,47 +51,124 @@ class ThreadInfo(BaseModel):
     nofication: str
 
 
-async def gen_thread_info(thread_id: int, user_id: int, message: str) -> ThreadInfo:
-    context = BotContext(thread_id=thread_id, user_id=user_id)
-    generator = gemini_agent.clone(
-        instructions="너는 훌룡한 제목 및 문구 생성기야 사용자의 요구에 따라 적절한 문구를 생성해야 해",
-        output_type=ThreadInfo,
-    )
+title_generator = gemini_agent.clone(
+    instructions="너는 훌룡한 제목 및 문구 생성기야 사용자의 요구에 따라 적절한 문구를 생성해야 해",
+    output_type=ThreadInfo,
+    tools=[],
+)
 
-    result = await Runner.run(
-        generator,
-        (
-            f"<goal>{message}</goal>\n"
-            "위 내용을 바탕으로 적절한 제목과 문구를 생성해줘.\n"
-            "제목은 디스코드 Thread 제목으로 사용될거야.\n"
-            "문구는 Thread를 생성하기 위한 Message로 사용될거야.\n"
-            "Thread가 생성되는 이유는 유저가 AI Agent와 새로운 대화를 시작하기 위함이야\n"
-            "goal tag가 비어있더라도 적절한 제목과 문구를 생성해줘\n"
-            "너무 딱딱하게 작성하지 말고, 친근한 느낌으로 작성해줘\n"
-            "이제 제목을 생성해봐."
-        ),
-        context=context,
-    )
-    return result.final_output
+thread_info_cache = TTLCache[str, ThreadInfo](
+    maxsize=int(os.getenv("THREAD_INFO_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("THREAD_INFO_CACHE_TTL", str(60 * 60 * 24))),
+)
 
+THREAD_INFO_POOL_SIZE = int(os.getenv("THREAD_INFO_POOL_SIZE", "5"))
+# 목표 없이 시작하는 채팅에 바로 쓸 수 있도록 미리 생성해 둔 제목
+_thread_info_pool: deque[ThreadInfo] = deque()
+_pool_task: asyncio.Task | None = None
 
-def call_agent(
-    thread_id: int,
-    user_id: int,
-    messages: "list[TResponseInputItem]",
-):
+
+def _normalize_goal(goal: str) -> str:
+    return " ".join(goal.lower().split())
+
+
+async def _generate_thread_info(
+    thread_id: int, user_id: int, message: str, priority: int
+) -> ThreadInfo:
     context = BotContext(thread_id=thread_id, user_id=user_id)
-    result = Runner.run_streamed(
-        gemini_agent,
-        messages,
-        context=context,
+    prompt = (
+        f"<goal>{message}</goal>\n"
+        "위 내용을 바탕으로 적절한 제목과 문구를 생성해줘.\n"
+        "제목은 디스코드 Thread 제목으로 사용될거야.\n"
+        "문구는 Thread를 생성하기 위한 Message로 사용될거야.\n"
+        "Thread가 생성되는 이유는 유저가 AI Agent와 새로운 대화를 시작하기 위함이야\n"
+        "goal tag가 비어있더라도 적절한 제목과 문구를 생성해줘\n"
+        "너무 딱딱하게 작성하지 말고, 친근한 느낌으로 작성해줘\n"
+        "이제 제목을 생성해봐."
     )
-    return result
+    tokens = approximate_tokens(prompt)
+    async with admission.admit(priority, tokens) as ticket:
+        result = await router.run(title_generator, prompt, tokens, context=context)
+        ticket.report_usage(_used_tokens(result))
+    return result.final_output
+
+
+def refill_thread_info_pool() -> None:
+    global _pool_task
+    if len(_thread_info_pool) >= THREAD_INFO_POOL_SIZE:
+        return
+    if _pool_task is None or _pool_task.done():
+        _pool_task = asyncio.create_task(_fill_thread_info_pool())
 
 
-def get_message(thread_id: int) -> list[TResponseInputItem]:
-    return message_db.get(thread_id, [])[-12:]
+async def _fill_thread_info_pool() -> None:
+    while len(_thread_info_pool) < THREAD_INFO_POOL_SIZE:
+        try:
+            info = await _generate_thread_info(0, 0, "", PRIORITY_IDLE)
+        except Exception:
+            logger.exception("Failed to fill thread info pool")
+            return
+        _thread_info_pool.append(info)
 
 
-def save_message(thread_id: int, messages: list[TResponseInputItem]) -> None:
-    message_db[thread_id] = messages
+async def gen_thread_info(thread_id: int, user_id: int, message: str) -> ThreadInfo:
+    key = _normalize_goal(message)
+    if not key:
+        if _thread_info_pool:
+            info = _thread_info_pool.popleft()
+        else:
+            info = await _generate_thread_info(
+                thread_id, user_id, message, PRIORITY_BACKGROUND
+            )
+        refill_thread_info_pool()
+        return info
+
+    if cached := thread_info_cache.get(key):
+        return cached
+    info = await _generate_thread_info(thread_id, user_id, message, PRIORITY_BACKGROUND)
+    thread_info_cache.set(key, info)
+    return info
+
+
+@asynccontextmanager
+async def call_agent(
+    thread_id: int,
+    user_id: int,
+    messages: "list[TResponseInputItem]",
+) -> AsyncIterator[RoutedRun]:
+    context = BotContext(thread_id=thread_id, user_id=user_id)
+    tokens = count_tokens(messages)
+    async with admission.admit(PRIORITY_CONVERSATION, tokens) as ticket:
+        result = await router.run_streamed(
+            gemini_agent,
+            messages,
+            tokens,
+            admission=admission,
+            context=context,
+        )
+        try:
+            yield result
+        finally:
+            ticket.report_usage(_used_tokens(result))
+
+
+def _used_tokens(result: RunResult | RoutedRun) -> int:
+    return sum(response.usage.total_tokens for response in result.raw_responses)
+
+
+async def get_message(
+    thread_id: int, pending: list[TResponseInputItem]
+) -> list[TResponseInputItem]:
+    history = await message_store.get(thread_id) or []
+    if history and is_summary_item(history[0]):
+        return context_builder.build(
+            history[1:], pending, pinned=history[:1], thread_id=thread_id
+        )
+    return context_builder.build(history, pending, thread_id=thread_id)
+
+
+async def append_message(thread_id: int, messages: list[TResponseInputItem]) -> None:
+    async with history_lock(thread_id):
+        history = trim_history((await message_store.get(thread_id) or []) + messages)
+        await message_store.set(thread_id, history)
+    summarizer.schedule(thread_id, history)
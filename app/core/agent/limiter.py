@@ -0,0 +1,139 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from app.common.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 숫자가 작을수록 먼저 처리
+PRIORITY_CONVERSATION = 0
+PRIORITY_BACKGROUND = 1
+PRIORITY_IDLE = 2
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        # 실제 사용량 보정으로 음수가 될 수 있음 (다음 요청이 그만큼 대기)
+        self.tokens -= amount
+
+
+class Ticket:
+    def __init__(self, controller: "AdmissionController", tokens: int):
+        self.controller = controller
+        self.tokens = tokens
+
+    def report_usage(self, tokens: int) -> None:
+        if tokens <= 0:
+            return
+        self.controller.tokens.consume(tokens - self.tokens)
+        self.tokens = tokens
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        name: str = "llm",
+    ):
+        self.max_concurrency = max_concurrency
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.name = name
+        self.active = 0
+        self._counter = itertools.count()
+        self._waiters: list[tuple[int, int, int, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+
+    @asynccontextmanager
+    async def admit(self, priority: int, tokens: int) -> AsyncIterator[Ticket]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), tokens, future))
+        start = time.monotonic()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+        waited = time.monotonic() - start
+        metrics.observe(f"{self.name}.queue_time", waited)
+        metrics.observe(f"{self.name}.queue_time.p{priority}", waited)
+        if waited > 1:
+            logger.info(
+                f"{self.name} request waited {waited:.2f}s (priority {priority})"
+            )
+        try:
+            yield Ticket(self, tokens)
+        finally:
+            self._release()
+
+    def try_charge(self, tokens: int) -> bool:
+        # 대기열을 거치지 않는 추가 요청(헤징)은 대기 중인 요청이 없고
+        # 한도에 여유가 있을 때만 허용하고 사용량을 바로 차감
+        if any(not future.done() for *_, future in self._waiters):
+            return False
+        if max(self.requests.delay(1), self.tokens.delay(tokens)) > 0:
+            return False
+        self.requests.consume(1)
+        self.tokens.consume(tokens)
+        metrics.incr(f"{self.name}.charged")
+        return True
+
+    def charge_request(self) -> None:
+        # 이미 입장한 실행 안에서 이어지는 모델 호출(tool 호출 후 재요청)은
+        # 기다리게 하지 않고 요청 수만 차감, 한도를 넘은 만큼 다음 입장이 늦어짐
+        self.requests.consume(1)
+        metrics.incr(f"{self.name}.followup_requests")
+
+    def _release(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters and self.active < self.max_concurrency:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = max(self.requests.delay(1), self.tokens.delay(tokens))
+            if delay > 0:
+                loop = asyncio.get_running_loop()
+                self._timer = loop.call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.active += 1
+            metrics.incr(f"{self.name}.admitted")
+            future.set_result(None)
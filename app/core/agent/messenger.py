@@ -1,4 +1,7 @@
+import asyncio
 import logging
+import os
+import time
 from typing import TYPE_CHECKING, Callable, List, Literal
 
 from pydantic import BaseModel
@@ -8,6 +11,8 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+UPDATE_INTERVAL = float(os.getenv("MESSAGE_UPDATE_INTERVAL", "1.0"))
+
 
 class MessagePart(BaseModel):
     content: str
@@ -15,13 +20,25 @@ class MessagePart(BaseModel):
 
 
 class Messenger:
-    def __init__(self, thread: "Thread", splitter: Callable[[str], List[str]]):
+    def __init__(
+        self,
+        thread: "Thread",
+        splitter: Callable[[str], List[str]],
+        interval: float = UPDATE_INTERVAL,
+    ):
         self.thread = thread
         self.splitter = splitter
+        self.interval = interval
         self.messages: "List[Message]" = []
         self._sended_contents: List[str] = []
         self._pending_parts: List[str] = []
         self._contents: List[MessagePart] = []
+        self._streaming = False
+        self._lock = asyncio.Lock()
+        self._dirty = False
+        self._last_flush = 0.0
+        self._flush_task: asyncio.Task | None = None
+        self._sleeping = False
 
     def _message_builder(self) -> str:
         result = ""
@@ -37,23 +54,82 @@ class Messenger:
     def add_content(
         self, content: str, type: Literal["text", "image", "tool"] = "text"
     ):
+        self._streaming = False
         self._contents.append(MessagePart(content=content, type=type))
 
+    def append_content(self, delta: str):
+        if not self._streaming:
+            self._contents.append(MessagePart(content="", type="text"))
+            self._streaming = True
+        self._contents[-1].content += delta
+
+    def end_stream(self, content: str):
+        if self._streaming:
+            # 스트리밍된 내용을 최종 응답으로 교체
+            self._contents[-1].content = content
+            self._streaming = False
+        else:
+            self.add_content(content)
+
     def del_content(self):
+        self._streaming = False
         if self._contents:
             self._contents.pop()
+        # 지운 내용(예: "생각 중...")을 대신할 첫 내용은 간격을 기다리지 않고 보냄
+        self._last_flush = 0.0
+
+    def schedule_update(self):
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while self._dirty:
+            wait = self._last_flush + self.interval - time.monotonic()
+            if wait > 0:
+                self._sleeping = True
+                try:
+                    await asyncio.sleep(wait)
+                finally:
+                    self._sleeping = False
+            self._dirty = False
+            try:
+                await self.update_message()
+            except Exception:
+                logger.exception("Failed to update message")
+
+    async def close(self):
+        task = self._flush_task
+        if task is not None and not task.done():
+            # 간격을 기다리는 중이면 취소하고 바로 보냄, 전송 중이면 끝날 때까지 대기
+            if self._sleeping:
+                task.cancel()
+            await asyncio.wait([task])
+        self._dirty = False
+        await self.update_message()
 
     async def update_message(self):
-        content = self._message_builder()
-        if not content:
-            return
-        pending_parts = self.splitter(content)
-        for i, part in enumerate(pending_parts):
-            if i < len(self.messages):
-                if self._sended_contents[i] != part:
-                    await self.messages[i].edit(content=part)
+        async with self._lock:
+            content = self._message_builder()
+            if not content:
+                return
+            pending_parts = self.splitter(content)
+            edits: list[tuple[int, str]] = []
+            for i, part in enumerate(pending_parts):
+                if i < len(self.messages):
+                    if self._sended_contents[i] != part:
+                        edits.append((i, part))
+                else:
+                    msg = await self.thread.send(content=part)
+                    self.messages.append(msg)
+                    self._sended_contents.append(part)
+            results = await asyncio.gather(
+                *(self.messages[i].edit(content=part) for i, part in edits),
+                return_exceptions=True,
+            )
+            for (i, part), result in zip(edits, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Failed to edit message chunk {i}: {result}")
+                else:
                     self._sended_contents[i] = part
-            else:
-                msg = await self.thread.send(content=part)
-                self.messages.append(msg)
-                self._sended_contents.append(part)
+            self._last_flush = time.monotonic()
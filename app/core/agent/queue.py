@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def raise_if_cancelled() -> None:
+    # openai-agents의 stream_events()는 CancelledError를 잡고 조용히 끝나므로
+    # 스트림이 끝난 뒤 남아 있는 취소 요청을 확인해서 다시 발생시킴
+    task = asyncio.current_task()
+    if task is not None and task.cancelling():
+        raise asyncio.CancelledError
+
+
+class ThreadDispatcher(Generic[T]):
+    """
+    Runs at most one job per thread and bounds the number of running threads.
+
+    Items submitted while a thread is busy wait in a per-thread queue. With
+    `coalesce` every waiting item is handed to the next run as one batch, and
+    with `cancel_on_new` a new item cancels the running job and is retried
+    together with the cancelled batch.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[int, list[T]], Awaitable[None]],
+        max_concurrency: int,
+        max_pending: int,
+        coalesce: bool = True,
+        cancel_on_new: bool = False,
+    ):
+        self.handler = handler
+        self.max_pending = max_pending
+        self.coalesce = coalesce
+        self.cancel_on_new = cancel_on_new
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending: dict[int, deque[T]] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+        self._runs: dict[int, asyncio.Task] = {}
+
+    def submit(self, thread_id: int, item: T) -> bool:
+        pending = self._pending.setdefault(thread_id, deque())
+        if len(pending) >= self.max_pending:
+            logger.warning(f"thread {thread_id} queue is full, dropping message")
+            return False
+        pending.append(item)
+        if self.cancel_on_new and (run := self._runs.get(thread_id)):
+            run.cancel()
+        if thread_id not in self._workers:
+            self._workers[thread_id] = asyncio.create_task(self._worker(thread_id))
+        return True
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "pending": sum(len(pending) for pending in self._pending.values()),
+            "running": len(self._runs),
+            "threads": len(self._workers),
+        }
+
+    async def _worker(self, thread_id: int):
+        pending = self._pending[thread_id]
+        try:
+            while pending:
+                async with self._semaphore:
+                    if not pending:
+                        break
+                    if self.coalesce:
+                        batch = list(pending)
+                        pending.clear()
+                    else:
+                        batch = [pending.popleft()]
+                    run = asyncio.create_task(self.handler(thread_id, batch))
+                    self._runs[thread_id] = run
+                    await asyncio.wait([run])
+                    del self._runs[thread_id]
+                if run.cancelled():
+                    logger.info(f"thread {thread_id} run cancelled by a new message")
+                    pending.extendleft(reversed(batch))
+                elif exc := run.exception():
+                    logger.error(f"thread {thread_id} run failed", exc_info=exc)
+        finally:
+            del self._workers[thread_id]
+            if not pending:
+                del self._pending[thread_id]
@@ -0,0 +1,222 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from app.common.utils.locks import KeyedLock
+from app.core.database import document, run_sync
+
+logger = logging.getLogger(__name__)
+
+CHUNK_CHARS = int(os.getenv("RETRIEVAL_CHUNK_CHARS", "1500"))
+MAX_CHARS = int(os.getenv("RETRIEVAL_MAX_CHARS", str(5_000_000)))
+# 메모리에 올려 두는 색인 전체의 글자 수 상한, 오래 안 쓴 스레드부터 내림
+MAX_INDEX_CHARS = int(os.getenv("RETRIEVAL_MAX_INDEX_CHARS", str(20_000_000)))
+TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "5"))
+RETENTION_DAYS = float(os.getenv("RETRIEVAL_RETENTION_DAYS", "30"))
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    tokens: list[str] = []
+    for word in WORD_PATTERN.findall(text.lower()):
+        tokens.append(word)
+        if not word.isascii():
+            # 한국어는 조사가 붙어 있으므로 글자 2-gram도 함께 색인
+            tokens.extend(word[i : i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def _count_terms(contents: list[str]) -> list[Counter[str]]:
+    return [Counter(tokenize(content)) for content in contents]
+
+
+@dataclass
+class Chunk:
+    file_name: str
+    position: int
+    content: str
+
+
+class BM25Index:
+    def __init__(self):
+        self.chunks: list[Chunk] = []
+        self.lengths: list[int] = []
+        self.total_length = 0
+        self.chars = 0
+        # term -> [(chunk index, term frequency)]
+        self.postings: dict[str, list[tuple[int, int]]] = {}
+
+    def add(self, chunk: Chunk, frequencies: Counter[str] | None = None) -> None:
+        idx = len(self.chunks)
+        if frequencies is None:
+            frequencies = Counter(tokenize(chunk.content))
+        length = sum(frequencies.values())
+        self.chunks.append(chunk)
+        self.lengths.append(length)
+        self.total_length += length
+        self.chars += len(chunk.content)
+        for term, count in frequencies.items():
+            self.postings.setdefault(term, []).append((idx, count))
+
+    def search(self, query: str, k: int) -> list[Chunk]:
+        total = len(self.chunks)
+        if total == 0:
+            return []
+        average = self.total_length / total or 1
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for idx, count in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[idx] / average)
+                scores[idx] = scores.get(idx, 0.0) + idf * count * (BM25_K1 + 1) / (
+                    count + norm
+                )
+        best = heapq.nlargest(k, scores.items(), key=lambda score: score[1])
+        return [self.chunks[idx] for idx, _ in best]
+
+
+class DocumentWriter:
+    def __init__(self, retriever: "Retriever", thread_id: int, file_name: str):
+        self.retriever = retriever
+        self.thread_id = thread_id
+        self.file_name = file_name
+        self.size = 0
+        self._buf = ""
+        self._chunks: list[str] = []
+
+    def feed(self, text: str) -> None:
+        if self.size >= MAX_CHARS:
+            return
+        text = text[: MAX_CHARS - self.size]
+        self.size += len(text)
+        self._buf += text
+        while len(self._buf) >= CHUNK_CHARS:
+            cut = self._buf.rfind("\n", CHUNK_CHARS // 2, CHUNK_CHARS)
+            cut = CHUNK_CHARS if cut < 0 else cut + 1
+            self._chunks.append(self._buf[:cut])
+            self._buf = self._buf[cut:]
+
+    async def close(self, content_hash: str) -> int:
+        if self._buf.strip():
+            self._chunks.append(self._buf)
+        self._buf = ""
+        chunks, self._chunks = self._chunks, []
+        await self.retriever.add(self.thread_id, self.file_name, chunks, content_hash)
+        return len(chunks)
+
+    def discard(self) -> None:
+        self._buf = ""
+        self._chunks = []
+
+
+class Retriever:
+    def __init__(self, max_chars: int = MAX_INDEX_CHARS):
+        self.max_chars = max_chars
+        self.size = 0
+        self._indexes: OrderedDict[int, BM25Index] = OrderedDict()
+        # 스레드마다 따로 잠가서 한 스레드의 DB 읽기가 다른 스레드 검색을 막지 않게 함
+        self._lock = KeyedLock[int]()
+        # 오래된 청크를 지울 때마다 증가, 그 사이에 읽은 색인은 캐시하지 않음
+        self._epoch = 0
+
+    def writer(self, thread_id: int, file_name: str) -> DocumentWriter:
+        return DocumentWriter(self, thread_id, file_name)
+
+    async def _get_index(self, thread_id: int) -> BM25Index:
+        index = self._indexes.get(thread_id)
+        if index is None:
+            async with self._lock(thread_id):
+                index = self._indexes.get(thread_id)
+                if index is None:
+                    return await self._load(thread_id)
+        self._indexes.move_to_end(thread_id)
+        return index
+
+    async def _load(self, thread_id: int) -> BM25Index:
+        epoch = self._epoch
+        rows = await run_sync(document.load_chunks, thread_id)
+        index = BM25Index()
+        frequencies = await asyncio.to_thread(
+            _count_terms, [content for _, _, content in rows]
+        )
+        for (file_name, position, content), terms in zip(rows, frequencies):
+            index.add(Chunk(file_name, position, content), terms)
+        if epoch == self._epoch:
+            self._indexes[thread_id] = index
+            self.size += index.chars
+            self._evict()
+        return index
+
+    def _drop(self, thread_id: int) -> None:
+        index = self._indexes.pop(thread_id, None)
+        if index is not None:
+            self.size -= index.chars
+
+    def _evict(self) -> None:
+        # 방금 쓴 색인은 상한을 넘더라도 남겨 둠
+        while len(self._indexes) > 1 and self.size > self.max_chars:
+            _, index = self._indexes.popitem(last=False)
+            self.size -= index.chars
+
+    async def add(
+        self, thread_id: int, file_name: str, chunks: list[str], content_hash: str
+    ) -> None:
+        if not chunks:
+            return
+        async with self._lock(thread_id):
+            # 같은 이름의 파일을 다시 올리면 기존 청크를 교체, 내용이 같으면 그대로 둠
+            replaced = await run_sync(
+                document.replace_chunks, thread_id, file_name, content_hash, chunks
+            )
+            if replaced is None:
+                logger.info(f"{file_name} is already indexed in thread {thread_id}")
+                return
+            index = self._indexes.get(thread_id)
+            if index is not None and replaced:
+                # BM25 색인에서는 청크를 뺄 수 없으므로 다음 조회 때 DB에서 다시 읽음
+                self._drop(thread_id)
+            elif index is not None:
+                # 토큰화는 CPU를 많이 쓰므로 이벤트 루프 밖에서 처리
+                frequencies = await asyncio.to_thread(_count_terms, chunks)
+                chars = index.chars
+                for position, (content, terms) in enumerate(zip(chunks, frequencies)):
+                    index.add(Chunk(file_name, position, content), terms)
+                # 기다리는 동안 내보내진 색인이면 다음 조회 때 DB에서 다시 읽음
+                if self._indexes.get(thread_id) is index:
+                    self.size += index.chars - chars
+                    self._evict()
+        logger.info(f"indexed {file_name} in thread {thread_id}: {len(chunks)} chunks")
+
+    async def has(self, thread_id: int, file_name: str, content_hash: str) -> bool:
+        return await run_sync(document.has_chunks, thread_id, file_name, content_hash)
+
+    async def search(self, thread_id: int, query: str, k: int = TOP_K) -> list[Chunk]:
+        index = await self._get_index(thread_id)
+        return index.search(query, k)
+
+    async def cleanup(self, retention_days: float = RETENTION_DAYS) -> int:
+        cutoff = datetime.now() - timedelta(days=retention_days)
+        deleted = await run_sync(document.delete_chunks_before, cutoff)
+        if deleted:
+            # 어느 스레드의 색인이 바뀌었는지 모르므로 모두 다시 읽게 함
+            self._epoch += 1
+            self._indexes.clear()
+            self.size = 0
+        if deleted:
+            logger.info(f"deleted {deleted} document chunks older than {cutoff}")
+        return deleted
+
+
+retriever = Retriever()
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+
+from agents import Agent, Runner, RunResult, RunResultStreaming, TResponseInputItem
+
+from app.common.utils.metrics import metrics
+
+from .limiter import AdmissionController
+
+logger = logging.getLogger(__name__)
+
+# "모델|최대 입력 토큰|image" 형식을 쉼표로 구분, 앞에 있을수록 우선
+MODELS = os.getenv(
+    "AGENT_MODELS",
+    "litellm/gemini/gemini-2.0-flash|1048576|image,"
+    "litellm/gemini/gemini-2.0-flash-lite|1048576|image",
+)
+HEDGE_AFTER = float(os.getenv("ROUTER_HEDGE_AFTER", "10"))
+LATENCY_THRESHOLD = float(os.getenv("ROUTER_LATENCY_THRESHOLD", "8"))
+LATENCY_PERCENTILE = float(os.getenv("ROUTER_LATENCY_PERCENTILE", "0.9"))
+MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5"))
+ERROR_COOLDOWN = float(os.getenv("ROUTER_ERROR_COOLDOWN", "60"))
+STATS_WINDOW = int(os.getenv("ROUTER_STATS_WINDOW", "20"))
+
+
+@dataclass
+class ModelSpec:
+    name: str
+    max_tokens: int
+    image: bool
+    outcomes: deque[bool] = field(default_factory=lambda: deque(maxlen=STATS_WINDOW))
+    last_error: float = 0.0
+
+    @property
+    def latency_metric(self) -> str:
+        return f"llm.first_token.{self.name}"
+
+    def error_rate(self) -> float:
+        if len(self.outcomes) < 3:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def healthy(self) -> bool:
+        # 쿨다운이 지나면 다시 시도해서 회복 여부를 확인
+        if time.monotonic() - self.last_error > ERROR_COOLDOWN:
+            return True
+        return self.error_rate() <= MAX_ERROR_RATE
+
+    def slow(self) -> bool:
+        latency = metrics.percentile(self.latency_metric, LATENCY_PERCENTILE)
+        return latency is not None and latency > LATENCY_THRESHOLD
+
+    def record(self, ok: bool) -> None:
+        self.outcomes.append(ok)
+        if not ok:
+            self.last_error = time.monotonic()
+            metrics.incr(f"llm.errors.{self.name}")
+
+
+def parse_models(value: str) -> list[ModelSpec]:
+    specs = []
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        name, max_tokens, *flags = [part.strip() for part in entry.split("|")]
+        specs.append(ModelSpec(name, int(max_tokens), "image" in flags))
+    return specs
+
+
+def has_image(items: list[TResponseInputItem]) -> bool:
+    for item in items:
+        content = item.get("content")
+        if isinstance(content, list) and any(
+            part.get("type") == "input_image" for part in content
+        ):
+            return True
+    return False
+
+
+class _Attempt:
+    def __init__(self, spec: ModelSpec, result: RunResultStreaming):
+        self.spec = spec
+        self.result = result
+        self.started = time.monotonic()
+        self.events = result.stream_events()
+        self.buffer: list[Any] = []
+        self.task = asyncio.create_task(self._first_token())
+
+    async def _first_token(self) -> None:
+        # agent_updated 이벤트는 모델 호출 전에 나오므로 첫 응답 이벤트까지 기다림
+        async for event in self.events:
+            self.buffer.append(event)
+            if event.type == "raw_response_event":
+                return
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def abandon(self) -> None:
+        self.result.cancel()
+        self.task.cancel()
+        self.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+
+class RoutedRun:
+    def __init__(
+        self, attempt: _Attempt, admission: AdmissionController | None = None
+    ):
+        self.spec = attempt.spec
+        self._attempt = attempt
+        self._admission = admission
+        self._model_calls = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._attempt.result, name)
+
+    async def stream_events(self) -> AsyncIterator[Any]:
+        attempt = self._attempt
+        try:
+            for event in attempt.buffer:
+                self._count(event)
+                yield event
+            attempt.buffer.clear()
+            async for event in attempt.events:
+                self._count(event)
+                yield event
+        except Exception:
+            self.spec.record(False)
+            raise
+        self.spec.record(True)
+
+    def _count(self, event: Any) -> None:
+        # 첫 모델 호출은 입장할 때 차감됐으므로 tool 호출 뒤 이어지는 호출만 차감
+        if event.type != "raw_response_event" or event.data.type != "response.created":
+            return
+        self._model_calls += 1
+        if self._model_calls > 1 and self._admission is not None:
+            self._admission.charge_request()
+
+
+class ModelRouter:
+    def __init__(self, models: list[ModelSpec], hedge_after: float = HEDGE_AFTER):
+        self.models = models
+        self.hedge_after = hedge_after
+        self._agents: dict[tuple[int, str], Agent] = {}
+
+    def select(self, tokens: int, image: bool = False) -> list[ModelSpec]:
+        if not self.models:
+            raise ValueError("No model is configured. Set AGENT_MODELS.")
+        candidates = [
+            spec
+            for spec in self.models
+            if spec.max_tokens >= tokens and (spec.image or not image)
+        ] or self.models
+        order = {spec.name: idx for idx, spec in enumerate(candidates)}
+        return sorted(
+            candidates,
+            key=lambda spec: (not spec.healthy(), spec.slow(), order[spec.name]),
+        )
+
+    def _agent_for(self, agent: Agent, spec: ModelSpec) -> Agent:
+        key = (id(agent), spec.name)
+        routed = self._agents.get(key)
+        if routed is None:
+            routed = self._agents[key] = agent.clone(model=spec.name)
+        return routed
+
+    async def run(
+        self, agent: Agent, input: str | list[TResponseInputItem], tokens: int, **kwargs
+    ) -> RunResult:
+        error: Exception | None = None
+        for spec in self.select(tokens):
+            started = time.monotonic()
+            try:
+                result = await Runner.run(self._agent_for(agent, spec), input, **kwargs)
+            except Exception as e:
+                logger.warning(f"model {spec.name} failed: {e!r}")
+                spec.record(False)
+                error = e
+                continue
+            # 전체 응답 시간이므로 첫 토큰 지연 시간과 따로 기록
+            metrics.observe(f"llm.latency.{spec.name}", time.monotonic() - started)
+            spec.record(True)
+            return result
+        raise error
+
+    async def run_streamed(
+        self,
+        agent: Agent,
+        input: list[TResponseInputItem],
+        tokens: int,
+        admission: AdmissionController | None = None,
+        **kwargs,
+    ) -> RoutedRun:
+        candidates = deque(self.select(tokens, has_image(input)))
+        attempts: list[_Attempt] = []
+        error: Exception | None = None
+
+        def start() -> None:
+            spec = candidates.popleft()
+            result = Runner.run_streamed(self._agent_for(agent, spec), input, **kwargs)
+            attempts.append(_Attempt(spec, result))
+
+        start()
+        try:
+            while attempts:
+                # 첫 토큰이 늦으면 다음 모델로 동시에 요청을 보내고 먼저 응답한 쪽을 사용
+                timeout = self.hedge_after if candidates and self.hedge_after else None
+                done, _ = await asyncio.wait(
+                    [attempt.task for attempt in attempts],
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    # 헤징 요청도 호출 한도에 포함, 여유가 없으면 기존 요청만 기다림
+                    if admission is not None and not admission.try_charge(tokens):
+                        metrics.incr("llm.hedge_skipped")
+                        continue
+                    logger.info(f"hedging after {timeout}s: {candidates[0].name}")
+                    metrics.incr("llm.hedged")
+                    start()
+                    continue
+                for attempt in [a for a in attempts if a.task in done]:
+                    attempts.remove(attempt)
+                    if attempt.task.exception() is None:
+                        metrics.observe(attempt.spec.latency_metric, attempt.elapsed())
+                        return RoutedRun(attempt, admission)
+                    error = attempt.task.exception()
+                    logger.warning(f"model {attempt.spec.name} failed: {error!r}")
+                    attempt.spec.record(False)
+                if not attempts and candidates:
+                    start()
+            raise error
+        finally:
+            for attempt in attempts:
+                # 지연 시간은 최소값이라도 남겨 느린 모델이 뒤로 밀리게 함
+                metrics.observe(attempt.spec.latency_metric, attempt.elapsed())
+                attempt.abandon()
+
+
+router = ModelRouter(parse_models(MODELS))
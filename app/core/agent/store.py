@@ -0,0 +1,181 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from agents import TResponseInputItem
+
+from app.core.database import conversation, run_sync
+
+from .summary import is_summary_item
+
+logger = logging.getLogger(__name__)
+
+HISTORY_SIZE = int(os.getenv("AGENT_HISTORY_SIZE", "100"))
+
+
+def trim_history(
+    items: list[TResponseInputItem], size: int = HISTORY_SIZE
+) -> list[TResponseInputItem]:
+    summary = items[:1] if items and is_summary_item(items[0]) else []
+    items = items[len(summary) :][-size:]
+    # 잘린 앞부분에 tool 호출 결과만 남으면 모델이 처리하지 못함
+    start = 0
+    while start < len(items) and items[start].get("type") == "function_call_output":
+        start += 1
+    return summary + items[start:]
+
+
+class ConversationStore(Protocol):
+    async def get(self, thread_id: int) -> list[TResponseInputItem] | None: ...
+
+    async def set(self, thread_id: int, items: list[TResponseInputItem]) -> None: ...
+
+    async def delete(self, thread_id: int) -> None: ...
+
+    async def flush(self) -> None: ...
+
+
+class MemoryConversationStore:
+    def __init__(self, max_threads: int, max_bytes: int, ttl: float):
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        # thread_id -> (items, byte size, last access)
+        self._entries: OrderedDict[int, tuple[list[TResponseInputItem], int, float]] = (
+            OrderedDict()
+        )
+
+    async def get(self, thread_id: int) -> list[TResponseInputItem] | None:
+        entry = self._entries.get(thread_id)
+        if entry is None:
+            return None
+        items, size, accessed = entry
+        now = time.monotonic()
+        if now - accessed > self.ttl:
+            self._remove(thread_id)
+            return None
+        self._entries[thread_id] = (items, size, now)
+        self._entries.move_to_end(thread_id)
+        return items
+
+    async def set(self, thread_id: int, items: list[TResponseInputItem]) -> None:
+        self._remove(thread_id)
+        size = len(json.dumps(items, ensure_ascii=False))
+        if size > self.max_bytes:
+            logger.debug(f"conversation {thread_id} is too large to cache: {size}")
+            return
+        self._entries[thread_id] = (items, size, time.monotonic())
+        self.size += size
+        self._evict()
+
+    async def delete(self, thread_id: int) -> None:
+        self._remove(thread_id)
+
+    async def flush(self) -> None:
+        pass
+
+    def _remove(self, thread_id: int) -> None:
+        entry = self._entries.pop(thread_id, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for thread_id in [
+            thread_id
+            for thread_id, (_, _, accessed) in self._entries.items()
+            if now - accessed > self.ttl
+        ]:
+            self._remove(thread_id)
+        while self._entries and (
+            len(self._entries) > self.max_threads or self.size > self.max_bytes
+        ):
+            thread_id, (_, size, _) = self._entries.popitem(last=False)
+            self.size -= size
+
+
+class DatabaseConversationStore:
+    async def get(self, thread_id: int) -> list[TResponseInputItem] | None:
+        return await run_sync(conversation.load_conversation, thread_id)
+
+    async def set(self, thread_id: int, items: list[TResponseInputItem]) -> None:
+        await run_sync(conversation.save_conversation, thread_id, items)
+
+    async def delete(self, thread_id: int) -> None:
+        await run_sync(conversation.delete_conversation, thread_id)
+
+    async def flush(self) -> None:
+        pass
+
+
+class TieredConversationStore:
+    def __init__(self, memory: ConversationStore, persistent: ConversationStore):
+        self.memory = memory
+        self.persistent = persistent
+        # 아직 저장되지 않은 최신 기록, 스레드마다 writer 하나가 순서대로 저장함
+        self._pending: dict[int, list[TResponseInputItem]] = {}
+        self._writers: dict[int, asyncio.Task] = {}
+
+    async def get(self, thread_id: int) -> list[TResponseInputItem] | None:
+        items = await self.memory.get(thread_id)
+        if items is not None:
+            return items
+        if thread_id in self._pending:
+            return self._pending[thread_id]
+        try:
+            items = await self.persistent.get(thread_id)
+        except Exception:
+            logger.exception(f"Failed to load conversation {thread_id}")
+            return None
+        if items is not None:
+            await self.memory.set(thread_id, items)
+        return items
+
+    async def set(self, thread_id: int, items: list[TResponseInputItem]) -> None:
+        # 응답을 기다리게 하지 않도록 DB 저장은 뒤에서 처리
+        await self.memory.set(thread_id, items)
+        self._pending[thread_id] = items
+        if thread_id not in self._writers:
+            self._writers[thread_id] = asyncio.create_task(self._write(thread_id))
+
+    async def _write(self, thread_id: int) -> None:
+        try:
+            # 저장하는 동안 들어온 기록은 마지막 것만 저장
+            while thread_id in self._pending:
+                items = self._pending.pop(thread_id)
+                try:
+                    await self.persistent.set(thread_id, items)
+                except Exception:
+                    logger.exception(f"Failed to save conversation {thread_id}")
+        finally:
+            self._writers.pop(thread_id, None)
+
+    async def delete(self, thread_id: int) -> None:
+        await self.memory.delete(thread_id)
+        self._pending.pop(thread_id, None)
+        if writer := self._writers.get(thread_id):
+            await writer
+        await self.persistent.delete(thread_id)
+
+    async def flush(self) -> None:
+        while self._writers:
+            await asyncio.gather(*self._writers.values())
+
+
+def create_store() -> ConversationStore:
+    memory = MemoryConversationStore(
+        max_threads=int(os.getenv("AGENT_HISTORY_MAX_THREADS", "1000")),
+        max_bytes=int(os.getenv("AGENT_HISTORY_MAX_BYTES", str(64 * 1024 * 1024))),
+        ttl=float(os.getenv("AGENT_HISTORY_TTL", str(60 * 60 * 6))),
+    )
+    store_type = os.getenv("AGENT_HISTORY_STORE", "database")
+    if store_type == "memory":
+        return memory
+    elif store_type == "database":
+        return TieredConversationStore(memory, DatabaseConversationStore())
+    raise ValueError("Unsupported history store. Use 'memory' or 'database'.")
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+from typing import TYPE_CHECKING
+
+from agents import Agent, Runner, TResponseInputItem
+
+from app.common.utils.locks import KeyedLock
+
+from .limiter import PRIORITY_BACKGROUND, AdmissionController
+from .tokens import approximate_tokens
+
+if TYPE_CHECKING:
+    from .store import ConversationStore
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_THRESHOLD = int(os.getenv("AGENT_SUMMARY_THRESHOLD", "40"))
+SUMMARY_KEEP = int(os.getenv("AGENT_SUMMARY_KEEP", "16"))
+SUMMARY_MODEL = os.getenv("AGENT_SUMMARY_MODEL", "litellm/gemini/gemini-2.0-flash-lite")
+SUMMARY_TAG = "conversation_summary"
+TRANSCRIPT_ITEM_LIMIT = 1000
+
+summary_agent = Agent(
+    name="Summary Agent",
+    model=SUMMARY_MODEL,
+    instructions=(
+        "너는 대화 요약기야.\n"
+        "주어진 이전 요약과 대화 기록을 하나의 요약으로 합쳐야 해.\n"
+        "사용자의 목표, 결정된 사항, 중요한 사실, 아직 해결되지 않은 질문을 빠짐없이 남기고\n"
+        "인사말이나 반복되는 내용은 생략해.\n"
+        "요약만 출력해."
+    ),
+)
+
+
+def is_summary_item(item: TResponseInputItem) -> bool:
+    content = item.get("content")
+    return (
+        item.get("role") == "system"
+        and isinstance(content, str)
+        and content.startswith(f"<{SUMMARY_TAG}>")
+    )
+
+
+def make_summary_item(summary: str) -> TResponseInputItem:
+    return {
+        "role": "system",
+        "content": f"<{SUMMARY_TAG}>\n{summary}\n</{SUMMARY_TAG}>",
+    }
+
+
+def _find_cut(history: list[TResponseInputItem], keep: int) -> int:
+    # 사용자 메시지 경계에서 잘라야 tool 호출/결과 쌍이 나뉘지 않음
+    for idx in range(len(history) - keep, 0, -1):
+        item = history[idx]
+        if item.get("role") == "user" and item.get("type", "message") == "message":
+            return idx
+    return 0
+
+
+def _render_item(item: TResponseInputItem) -> str:
+    item_type = item.get("type", "message")
+    if item_type == "function_call":
+        return f"[tool call] {item.get('name')}({item.get('arguments')})"
+    elif item_type == "function_call_output":
+        return f"[tool result] {str(item.get('output'))[:TRANSCRIPT_ITEM_LIMIT]}"
+    content = item.get("content")
+    if isinstance(content, str):
+        text = content
+    else:
+        texts = []
+        for part in content or ():
+            if part.get("type") in ("input_image", "image_url"):
+                texts.append("[이미지]")
+            else:
+                texts.append(part.get("text") or "")
+        text = "\n".join(texts)
+    return f"{item.get('role')}: {text[:TRANSCRIPT_ITEM_LIMIT]}"
+
+
+class Summarizer:
+    def __init__(
+        self,
+        store: "ConversationStore",
+        admission: AdmissionController,
+        lock: KeyedLock[int],
+        threshold: int = SUMMARY_THRESHOLD,
+        keep: int = SUMMARY_KEEP,
+    ):
+        self.store = store
+        self.admission = admission
+        self.lock = lock
+        self.threshold = threshold
+        self.keep = keep
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    def schedule(self, thread_id: int, history: list[TResponseInputItem]) -> None:
+        if len(history) <= self.threshold or thread_id in self._tasks:
+            return
+        task = asyncio.create_task(self._summarize(thread_id, history))
+        self._tasks[thread_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(thread_id, None))
+
+    async def _summarize(
+        self, thread_id: int, history: list[TResponseInputItem]
+    ) -> None:
+        cut = _find_cut(history, self.keep)
+        if cut == 0:
+            return
+        old = history[:cut]
+        transcript = "\n".join(_render_item(item) for item in old)
+        prompt = f"<history>\n{transcript}\n</history>\n위 대화를 요약해줘."
+        try:
+            async with self.admission.admit(
+                PRIORITY_BACKGROUND, approximate_tokens(prompt)
+            ) as ticket:
+                result = await Runner.run(summary_agent, prompt)
+                ticket.report_usage(
+                    sum(r.usage.total_tokens for r in result.raw_responses)
+                )
+        except Exception:
+            logger.exception(f"Failed to summarize thread {thread_id}")
+            return
+
+        # 요약하는 동안 기록이 바뀌었으면 요약한 앞부분이 그대로일 때만 교체
+        # 읽고 쓰는 사이에 추가된 메시지를 덮어쓰지 않도록 메시지 추가와 같은 잠금 사용
+        async with self.lock(thread_id):
+            current = await self.store.get(thread_id) or []
+            if current[:cut] != old:
+                logger.debug(f"thread {thread_id} history changed, skip summary")
+                return
+            summary = make_summary_item(str(result.final_output).strip())
+            await self.store.set(thread_id, [summary] + current[cut:])
+        logger.info(f"summarized thread {thread_id}: {cut} items")
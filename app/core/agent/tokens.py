@@ -0,0 +1,56 @@
+import logging
+import os
+from typing import Callable
+
+from agents import TResponseInputItem
+
+logger = logging.getLogger(__name__)
+
+IMAGE_TOKENS = 258
+IMAGE_PART_TYPES = ("input_image", "image_url")
+
+Tokenizer = Callable[[str], int]
+
+
+def approximate_tokens(text: str) -> int:
+    # 한글 등 ASCII 외 문자는 대략 글자당 1토큰, ASCII는 4글자당 1토큰
+    non_ascii = len(text) - len(text.encode("ascii", "ignore"))
+    return (len(text) - non_ascii) // 4 + non_ascii + 1
+
+
+def get_tokenizer(name: str) -> Tokenizer:
+    if name == "approximate":
+        return approximate_tokens
+    elif name == "tiktoken":
+        try:
+            import tiktoken
+        except ImportError:
+            logger.warning("tiktoken is not installed, using approximate tokenizer")
+            return approximate_tokens
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    raise ValueError("Unsupported tokenizer. Use 'approximate' or 'tiktoken'.")
+
+
+tokenizer = get_tokenizer(os.getenv("AGENT_TOKENIZER", "approximate"))
+
+
+def count_item_tokens(item: TResponseInputItem, tokenize: Tokenizer = tokenizer) -> int:
+    content = item.get("content")
+    if content is None:
+        content = item.get("output") or item.get("arguments") or ""
+    if isinstance(content, str):
+        return tokenize(content) + 4
+    tokens = 4
+    for part in content:
+        if part.get("type") in IMAGE_PART_TYPES:
+            tokens += IMAGE_TOKENS
+        else:
+            tokens += tokenize(part.get("text") or "")
+    return tokens
+
+
+def count_tokens(
+    items: list[TResponseInputItem], tokenize: Tokenizer = tokenizer
+) -> int:
+    return sum(count_item_tokens(item, tokenize) for item in items)
@@ -1,16 +1,24 @@
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Generator
+from functools import partial
+from typing import Callable, Generator, ParamSpec, TypeVar
 
-from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel import Session, SQLModel
+
+from ...common.utils.metrics import metrics
+from .engine import create_postgres_engine, create_sqlite_engine, pool_stats
+from .migrations import run_migrations
+
+P = ParamSpec("P")
+T = TypeVar("T")
 
 database_type = os.getenv("DATABASE_TYPE", "sqlite")
 
 if database_type == "sqlite":
     sqlite_file_name = os.getenv("SQLITE_FILE_NAME", "test.db")
-    sqlite_url = f"sqlite:///{sqlite_file_name}"
-    connect_args = {"check_same_thread": False}
-    engine = create_engine(sqlite_url, connect_args=connect_args)
+    engine = create_sqlite_engine(sqlite_file_name)
 elif database_type == "postgresql":
     postgres_user = os.getenv("POSTGRES_USER")
     postgres_password = os.getenv("POSTGRES_PASSWORD")
@@ -18,16 +26,32 @@ elif database_type == "postgresql":
     postgres_host = os.getenv("POSTGRES_HOST", "localhost")
     postgres_port = os.getenv("POSTGRES_PORT", "5432")
     postgres_url = f"postgresql://{postgres_user}:{postgres_password}@{postgres_host}:{postgres_port}/{postgres_db}"
-    engine = create_engine(postgres_url)
+    engine = create_postgres_engine(postgres_url)
 else:
     raise ValueError("Unsupported database type. Use 'sqlite' or 'postgresql'.")
 
+metrics.register("db.pool", lambda: pool_stats(engine))
+
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    run_migrations(engine)
+
+
+# DB 작업은 전용 스레드에서 실행해서 이벤트 루프를 막지 않음
+executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DATABASE_THREADS", "4")),
+    thread_name_prefix="database",
+)
 
 
 @contextmanager
 def get_session() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+    # 세션을 닫은 뒤에도 반환한 객체를 읽을 수 있도록 commit 후 만료하지 않음
+    with Session(engine, expire_on_commit=False) as session:
         yield session
+
+
+async def run_sync(func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
@@ -0,0 +1,32 @@
+import json
+from datetime import datetime
+
+from sqlmodel import delete
+
+from ..model.agent import Conversation
+from . import get_session
+
+
+def load_conversation(thread_id: int) -> list | None:
+    with get_session() as session:
+        conversation = session.get(Conversation, thread_id)
+        if conversation is None:
+            return None
+        return json.loads(conversation.items)
+
+
+def save_conversation(thread_id: int, items: list) -> None:
+    with get_session() as session:
+        conversation = session.get(Conversation, thread_id)
+        if conversation is None:
+            conversation = Conversation(thread_id=thread_id, items="")
+        conversation.items = json.dumps(items, ensure_ascii=False)
+        conversation.updated_at = datetime.now()
+        session.add(conversation)
+        session.commit()
+
+
+def delete_conversation(thread_id: int) -> None:
+    with get_session() as session:
+        session.exec(delete(Conversation).where(Conversation.thread_id == thread_id))
+        session.commit()
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from sqlmodel import delete, select
+
+from ..model.agent import DocumentChunk
+from . import get_session
+
+
+def replace_chunks(
+    thread_id: int, file_name: str, content_hash: str, chunks: list[str]
+) -> int | None:
+    # 같은 내용이 이미 저장돼 있으면 None, 아니면 지운 기존 청크 수를 반환
+    with get_session() as session:
+        same_file = (DocumentChunk.thread_id == thread_id) & (
+            DocumentChunk.file_name == file_name
+        )
+        hashes = set(
+            session.exec(
+                select(DocumentChunk.content_hash).where(same_file).distinct()
+            ).all()
+        )
+        if hashes == {content_hash}:
+            return None
+        deleted = session.exec(delete(DocumentChunk).where(same_file)).rowcount
+        for idx, content in enumerate(chunks):
+            session.add(
+                DocumentChunk(
+                    thread_id=thread_id,
+                    file_name=file_name,
+                    position=idx,
+                    content=content,
+                    content_hash=content_hash,
+                )
+            )
+        session.commit()
+        return deleted
+
+
+def has_chunks(thread_id: int, file_name: str, content_hash: str) -> bool:
+    with get_session() as session:
+        chunk = session.exec(
+            select(DocumentChunk.id)
+            .where(DocumentChunk.thread_id == thread_id)
+            .where(DocumentChunk.file_name == file_name)
+            .where(DocumentChunk.content_hash == content_hash)
+            .limit(1)
+        ).first()
+        return chunk is not None
+
+
+def load_chunks(thread_id: int) -> list[tuple[str, int, str]]:
+    with get_session() as session:
+        chunks = session.exec(
+            select(DocumentChunk)
+            .where(DocumentChunk.thread_id == thread_id)
+            .order_by(DocumentChunk.id)
+        ).all()
+        return [(chunk.file_name, chunk.position, chunk.content) for chunk in chunks]
+
+
+def delete_chunks_before(cutoff: datetime) -> int:
+    with get_session() as session:
+        result = session.exec(
+            delete(DocumentChunk).where(DocumentChunk.created_at < cutoff)
+        )
+        session.commit()
+        return result.rowcount
@@ -0,0 +1,78 @@
+import os
+import time
+
+from sqlalchemy import Engine, event
+from sqlalchemy.pool import QueuePool
+from sqlmodel import create_engine
+
+from ...common.utils.metrics import metrics
+
+POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", os.getenv("DATABASE_THREADS", "4")))
+MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "4"))
+POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "10"))
+POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "true").lower() == "true"
+# PostgreSQL의 statement_timeout (ms), 실행 중인 쿼리를 이 시간이 지나면 취소
+STATEMENT_TIMEOUT = int(os.getenv("DATABASE_STATEMENT_TIMEOUT", "5000"))
+# SQLite의 busy timeout (ms), 다른 연결의 잠금이 풀리기를 기다리는 시간만 제한
+BUSY_TIMEOUT = int(os.getenv("DATABASE_BUSY_TIMEOUT", "5000"))
+
+
+class TimedQueuePool(QueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe("db.pool.wait", time.perf_counter() - started)
+
+
+def _pool_options() -> dict:
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+
+
+def create_sqlite_engine(file_name: str) -> Engine:
+    engine = create_engine(
+        f"sqlite:///{file_name}",
+        connect_args={
+            "check_same_thread": False,
+            # sqlite3의 timeout 인자가 busy_timeout을 설정하므로 PRAGMA는 따로 쓰지 않음
+            "timeout": BUSY_TIMEOUT / 1000,
+        },
+        **_pool_options(),
+    )
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        # WAL 모드에서는 읽기가 쓰기를 기다리지 않음
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    return engine
+
+
+def create_postgres_engine(url: str) -> Engine:
+    return create_engine(
+        url,
+        connect_args={"options": f"-c statement_timeout={STATEMENT_TIMEOUT}"},
+        **_pool_options(),
+    )
+
+
+def pool_stats(engine: Engine) -> dict[str, float]:
+    # 대기 시간은 db.pool.wait 샘플로 따로 기록됨
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
@@ -0,0 +1,105 @@
+from typing import Callable
+
+from sqlalchemy import Connection, Engine, inspect, text
+
+from ...common.logger import get_logger
+
+logger = get_logger(__name__)
+
+Migration = Callable[[Connection], None]
+
+
+def _add_column(connection: Connection, table: str, column: str, type: str) -> None:
+    columns = {c["name"] for c in inspect(connection).get_columns(table)}
+    if column not in columns:
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {type}"))
+
+
+def _create_index(
+    connection: Connection,
+    table: str,
+    name: str,
+    columns: list[str],
+    unique: bool = False,
+) -> None:
+    indexes = {index["name"] for index in inspect(connection).get_indexes(table)}
+    if name not in indexes:
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        connection.execute(
+            text(f"CREATE {kind} {name} ON {table} ({', '.join(columns)})")
+        )
+
+
+def _team_scope(connection: Connection) -> None:
+    # 이전에 만든 팀은 guild_id와 channel_id가 NULL로 남으므로 배포 후에는
+    # 길드/채널별 목록과 활성 팀 캐시에 나오지 않음 (행은 그대로 남아 있음)
+    _add_column(connection, "team", "guild_id", "BIGINT")
+    _add_column(connection, "team", "channel_id", "BIGINT")
+    _create_index(
+        connection,
+        "team",
+        "ix_team_guild_channel_created",
+        ["guild_id", "channel_id", "created_at"],
+    )
+
+
+def _unique_member(connection: Connection) -> None:
+    # 동시 참가로 이미 들어간 중복 행은 먼저 들어온 것만 남김
+    connection.execute(
+        text(
+            "DELETE FROM member WHERE id NOT IN "
+            "(SELECT MIN(id) FROM member GROUP BY team_id, discord_id)"
+        )
+    )
+    _create_index(
+        connection,
+        "member",
+        "ux_member_team_discord",
+        ["team_id", "discord_id"],
+        unique=True,
+    )
+
+
+def _document_hash(connection: Connection) -> None:
+    # agent 모델을 import하지 않고 시작하면 테이블이 없음
+    # 나중에 create_all이 만드는 테이블에는 컬럼과 인덱스가 이미 들어 있음
+    if not inspect(connection).has_table("documentchunk"):
+        return
+    # 기존 청크는 해시가 없으므로 같은 파일을 다시 올리면 한 번은 교체됨
+    _add_column(connection, "documentchunk", "content_hash", "VARCHAR")
+    _create_index(
+        connection,
+        "documentchunk",
+        "ix_documentchunk_thread_file",
+        ["thread_id", "file_name"],
+    )
+
+
+# 순서대로 한 번씩만 적용됨, 기존 항목은 수정하지 말고 뒤에 추가할 것
+MIGRATIONS: list[tuple[int, Migration]] = [
+    (1, _team_scope),
+    (2, _unique_member),
+    (3, _document_hash),
+]
+
+
+def run_migrations(engine: Engine) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+        )
+        current = connection.execute(
+            text("SELECT MAX(version) FROM schema_version")
+        ).scalar()
+    current = current or 0
+
+    for version, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as connection:
+            migration(connection)
+            connection.execute(
+                text("INSERT INTO schema_version (version) VALUES (:version)"),
+                {"version": version},
+            )
+        logger.info(f"applied migration {version}: {migration.__name__}")
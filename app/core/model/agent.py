@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, Index, Text
+from sqlmodel import Field, SQLModel
+
+
+class Conversation(SQLModel, table=True):
+    thread_id: int = Field(sa_column=Column(BigInteger(), primary_key=True))
+    items: str = Field(sa_column=Column(Text(), nullable=False))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now())
+
+
+class DocumentChunk(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_documentchunk_thread_file", "thread_id", "file_name"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    thread_id: int = Field(sa_column=Column(BigInteger(), index=True))
+    file_name: str
+    position: int
+    content: str = Field(sa_column=Column(Text(), nullable=False))
+    content_hash: str | None = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now())
@@ -1,13 +1,19 @@
 from datetime import datetime
 
-from sqlalchemy import BigInteger, Column
+from sqlalchemy import BigInteger, Column, Index
 from sqlmodel import Field, Relationship, SQLModel
 
 
 class Team(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_team_guild_channel_created", "guild_id", "channel_id", "created_at"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     name: str
     message_id: int = Field(sa_column=Column(BigInteger()))
+    guild_id: int | None = Field(default=None, sa_column=Column(BigInteger()))
+    channel_id: int | None = Field(default=None, sa_column=Column(BigInteger()))
     members: list["Member"] = Relationship(back_populates="team", cascade_delete=True)
     histories: list["TeamHistory"] = Relationship(
         back_populates="team", cascade_delete=True
@@ -17,6 +23,11 @@ class Team(SQLModel, table=True):
 
 
 class Member(SQLModel, table=True):
+    # 같은 팀에 같은 사용자가 두 번 들어가지 않도록 DB에서도 막음
+    __table_args__ = (
+        Index("ux_member_team_discord", "team_id", "discord_id", unique=True),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     discord_id: int = Field(sa_column=Column(BigInteger()))
     name: str
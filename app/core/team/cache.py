@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+from ..model.team import Team
+
+ACTIVE_PERIOD = timedelta(days=1)
+
+
+def is_active(team: Team) -> bool:
+    return team.created_at > datetime.now() - ACTIVE_PERIOD
+
+
+class ActiveTeamCache:
+    """
+    Active teams per guild, kept in sync by the team handler.
+
+    Every write goes through the handler in this process, so once a channel
+    has been loaded from the database its cached team list is complete.
+    """
+
+    def __init__(self):
+        # guild_id -> {team_id: team}
+        self._guilds: dict[int, dict[int, Team]] = {}
+        self._guild_of: dict[int, int] = {}
+        self._loaded: set[tuple[int, int]] = set()
+
+    def clear(self) -> None:
+        self._guilds.clear()
+        self._guild_of.clear()
+        self._loaded.clear()
+
+    def get(self, team_id: int) -> Team | None:
+        guild_id = self._guild_of.get(team_id)
+        if guild_id is None:
+            return None
+        team = self._guilds[guild_id].get(team_id)
+        if team is not None and not is_active(team):
+            self.remove(team_id)
+            return None
+        return team
+
+    def get_list(self, guild_id: int, channel_id: int) -> list[Team] | None:
+        if (guild_id, channel_id) not in self._loaded:
+            return None
+        self._expire(guild_id)
+        teams = [
+            team
+            for team in self._guilds.get(guild_id, {}).values()
+            if team.channel_id == channel_id
+        ]
+        return sorted(teams, key=lambda team: team.created_at, reverse=True)
+
+    def set_list(self, guild_id: int, channel_id: int, teams: list[Team]) -> None:
+        # 조회 중에 반영된 쓰기가 덮어써지지 않도록 캐시에 없는 팀만 추가
+        for team in teams:
+            if self.get(team.id) is None:
+                self.add(team)
+        self._loaded.add((guild_id, channel_id))
+
+    def add(self, team: Team) -> None:
+        # guild_id가 없는 예전 팀은 어느 목록에도 속하지 않으므로 캐시하지 않음
+        if team.guild_id is None or not is_active(team):
+            return
+        self._expire(team.guild_id)
+        self._guilds.setdefault(team.guild_id, {})[team.id] = team
+        self._guild_of[team.id] = team.guild_id
+
+    def remove(self, team_id: int) -> None:
+        guild_id = self._guild_of.pop(team_id, None)
+        if guild_id is None:
+            return
+        teams = self._guilds[guild_id]
+        teams.pop(team_id, None)
+        if not teams:
+            del self._guilds[guild_id]
+
+    def _expire(self, guild_id: int) -> None:
+        for team in list(self._guilds.get(guild_id, {}).values()):
+            if not is_active(team):
+                self.remove(team.id)
+
+
+active_teams = ActiveTeamCache()
@@ -1,34 +1,96 @@
 import json
 import random
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from sqlmodel import Session, select
-
-from app.core import team
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, delete, select
 
 from ...common.logger import get_logger
+from ..database import get_session, run_sync
 from ..error.team import TeamError
 from ..model.team import Member, Team, TeamHistory
+from .cache import ACTIVE_PERIOD, active_teams
 
 logger = get_logger(__name__)
 
 
+def _get_team(db: Session, team_id: int) -> Team:
+    # 세션 밖에서 렌더링하므로 팀원 목록을 함께 읽어 둠
+    team = db.get(Team, team_id, options=[selectinload(Team.members)])
+    if team is None:
+        raise TeamError(
+            "Team is not found.",
+            "팀을 찾을 수 없어요.",
+            "**/q**로 팀을 새로 생성해 보세요.",
+        )
+    return team
+
+
 ## new ###
-async def create_team(db: Session, message_id: int, name: str) -> Team:
-    team = Team(name=name, message_id=message_id)
-    db.add(team)
-    db.commit()
-    db.refresh(team)
+def _create_team(message_id: int, name: str, guild_id: int, channel_id: int) -> Team:
+    with get_session() as db:
+        team = Team(
+            name=name,
+            message_id=message_id,
+            guild_id=guild_id,
+            channel_id=channel_id,
+            members=[],
+        )
+        db.add(team)
+        db.commit()
+        return team
+
+
+async def create_team(
+    message_id: int, name: str, guild_id: int, channel_id: int
+) -> Team:
+    team = await run_sync(_create_team, message_id, name, guild_id, channel_id)
+    active_teams.add(team)
+    return team
+
+
+def _get_team_by_id(team_id: int) -> Team:
+    with get_session() as db:
+        return _get_team(db, team_id)
+
+
+async def get_team(team_id: int) -> Team:
+    team = active_teams.get(team_id)
+    if team is None:
+        loaded = await run_sync(_get_team_by_id, team_id)
+        # 조회 중에 다른 요청이 캐시를 채웠으면 그 객체를 써야 변경이 합쳐짐
+        team = active_teams.get(team_id)
+        if team is None:
+            team = loaded
+            active_teams.add(team)
     return team
 
 
 ### join ###
-def get_team_list(db: Session):
-    teams = db.exec(
-        select(Team)
-        .where(Team.created_at > (datetime.now() - timedelta(days=1)))
-        .order_by(Team.created_at.desc())
-    ).all()
+def _get_team_list(guild_id: int, channel_id: int) -> list[Team]:
+    with get_session() as db:
+        # (guild_id, channel_id, created_at) 인덱스 범위 조회
+        teams = db.exec(
+            select(Team)
+            .options(selectinload(Team.members))
+            .where(
+                Team.guild_id == guild_id,
+                Team.channel_id == channel_id,
+                Team.created_at > (datetime.now() - ACTIVE_PERIOD),
+            )
+            .order_by(Team.created_at.desc())
+        ).all()
+        return teams
+
+
+async def get_team_list(guild_id: int, channel_id: int) -> list[Team]:
+    teams = active_teams.get_list(guild_id, channel_id)
+    if teams is None:
+        teams = await run_sync(_get_team_list, guild_id, channel_id)
+        active_teams.set_list(guild_id, channel_id, teams)
+        # 캐시에 있던 객체를 돌려줘야 이후 변경이 같은 객체에 반영됨
+        teams = active_teams.get_list(guild_id, channel_id)
     if not teams:
         raise TeamError(
             "Team is not found.",
@@ -38,30 +100,62 @@ def get_team_list(db: Session):
     return teams
 
 
-async def add_member(db: Session, team: Team, user_id: int, user_name: str):
+def _insert_member(team_id: int, user_id: int, user_name: str) -> None:
+    with get_session() as db:
+        db.add(Member(team_id=team_id, discord_id=user_id, name=user_name))
+        db.commit()
+
+
+def _already_joined(team: Team) -> TeamError:
+    return TeamError(
+        f"Already in the team {team.name}.",
+        f"이미 **{team.name}** 팀에 참가하고 있어요.",
+        "팀을 떠나려면 **/c**로 취소해 주세요.",
+    )
+
+
+async def add_member(team: Team, user_id: int, user_name: str) -> Team:
+    team = await get_team(team.id)
     member_ids = [member.discord_id for member in team.members]
 
     # check duplication
     if user_id in member_ids:
-        raise TeamError(
-            f"Already in the team {team.name}.",
-            f"이미 **{team.name}** 팀에 참가하고 있어요.",
-            "팀을 떠나려면 **/c**로 취소해 주세요.",
-        )
-
-    # add member
-    member = Member(discord_id=user_id, name=user_name, team_id=team.id)
-    db.add(member)
-    db.commit()
-    db.refresh(team)
+        raise _already_joined(team)
+
+    # add member, 캐시를 먼저 바꿔 동시에 들어온 중복 참가를 막고 실패하면 되돌림
+    member = Member(discord_id=user_id, name=user_name)
+    team.members.append(member)
+    try:
+        await run_sync(_insert_member, team.id, user_id, user_name)
+    except IntegrityError:
+        # 캐시에 없던 참가 기록이 DB에 이미 있음 (unique 인덱스)
+        team.members.remove(member)
+        raise _already_joined(team)
+    except Exception:
+        team.members.remove(member)
+        raise
+    return team
 
 
 ### left ###
-async def remove_member(db: Session, team: Team, user_id: int, user_name: str):
-    member_ids = [member.discord_id for member in team.members]
+def _delete_member(team_id: int, user_id: int) -> None:
+    with get_session() as db:
+        db.exec(
+            delete(Member).where(
+                Member.team_id == team_id, Member.discord_id == user_id
+            )
+        )
+        db.commit()
+
+
+async def remove_member(team: Team, user_id: int, user_name: str) -> Team:
+    team = await get_team(team.id)
+    member = next(
+        (member for member in team.members if member.discord_id == user_id), None
+    )
 
     # check duplication
-    if user_id not in member_ids:
+    if member is None:
         raise TeamError(
             f"Already left the team {team.name}.",
             f"**{team.name}** 팀에 참가하지 않았어요.",
@@ -69,12 +163,13 @@ async def remove_member(db: Session, team: Team, user_id: int, user_name: str):
         )
 
     # delete member
-    member = db.exec(
-        select(Member).where(Member.team == team, Member.discord_id == user_id)
-    ).first()
-    db.delete(member)
-    db.commit()
-    db.refresh(team)
+    team.members.remove(member)
+    try:
+        await run_sync(_delete_member, team.id, user_id)
+    except Exception:
+        team.members.append(member)
+        raise
+    return team
 
 
 ### shuffle ###
@@ -82,7 +177,7 @@ MULTIPLE = 0.1
 BASE_WEIGHT = [[10000.0 for _ in range(5)] for _ in range(5)]
 
 
-async def get_random_team(db: Session, team: Team) -> list[int]:
+async def get_random_team(team: Team) -> list[int]:
     members = team.members
     if len(members) == 1:
         raise TeamError(
@@ -91,19 +186,29 @@ async def get_random_team(db: Session, team: Team) -> list[int]:
             "친구를 데려와 주세요.",
         )
     if len(members) == 5:
-        return await _shuffle_rank(db, team)
+        return await _shuffle_rank(team)
     else:
         return await shuffle_custom(team)
 
 
-async def _shuffle_rank(db: Session, team: Team) -> None:
-    histories = db.exec(select(TeamHistory).where(TeamHistory.team == team)).all()
+async def _shuffle_rank(team: Team) -> list[int]:
+    histories = await run_sync(_get_histories, team.id)
     rank_team = await _get_rank_team(histories)
-    db.add(TeamHistory(team=team, numbers=json.dumps(rank_team)))
-    db.commit()
+    await run_sync(_add_history, team.id, rank_team)
     return rank_team
 
 
+def _get_histories(team_id: int) -> list[TeamHistory]:
+    with get_session() as db:
+        return db.exec(select(TeamHistory).where(TeamHistory.team_id == team_id)).all()
+
+
+def _add_history(team_id: int, rank_team: list[int]) -> None:
+    with get_session() as db:
+        db.add(TeamHistory(team_id=team_id, numbers=json.dumps(rank_team)))
+        db.commit()
+
+
 async def _get_rank_team(histories: list[TeamHistory]) -> list[int]:
     team = []
     weights = await _get_weight(histories)
@@ -143,6 +248,15 @@ async def shuffle_custom(team: Team) -> list[int]:
     return members
 
 
-async def delete_team(db: Session, team: team):
-    db.delete(team)
-    db.commit()
+def _delete_team(team_id: int) -> None:
+    # 읽지 않고 바로 삭제, 자식 행부터 지움
+    with get_session() as db:
+        db.exec(delete(TeamHistory).where(TeamHistory.team_id == team_id))
+        db.exec(delete(Member).where(Member.team_id == team_id))
+        db.exec(delete(Team).where(Team.id == team_id))
+        db.commit()
+
+
+async def delete_team(team: Team) -> None:
+    await run_sync(_delete_team, team.id)
+    active_teams.remove(team.id)
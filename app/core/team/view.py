@@ -1,9 +1,7 @@
 import discord
 from discord import ui
-from sqlmodel import Session
 
 from ...common.logger import get_logger
-from ..database import get_session
 from ..error.team import TeamBaseError
 from ..model.team import Team
 from . import controller, handler
@@ -38,8 +36,7 @@ class JoinTeamView(BaseTeamView):
     @ui.button(label="참가", style=discord.ButtonStyle.success)
     async def join(self, interaction: discord.Interaction, button: ui.Button):
         await interaction.response.defer()
-        with get_session() as session:
-            await join_team(session, interaction, self.team)
+        await join_team(interaction, self.team)
 
 
 class TeamJoinView(BaseTeamView):
@@ -58,8 +55,7 @@ class TeamJoinView(BaseTeamView):
 
         async def callback(self, interaction: discord.Interaction):
             await interaction.response.defer()
-            with get_session() as session:
-                await join_team(session, interaction, self.team)
+            await join_team(interaction, self.team)
 
 
 class TeamLeftView(BaseTeamView):
@@ -78,8 +74,7 @@ class TeamLeftView(BaseTeamView):
 
         async def callback(self, interaction: discord.Interaction):
             await interaction.response.defer()
-            with get_session() as session:
-                await left_team(session, interaction, self.team)
+            await left_team(interaction, self.team)
 
 
 class TeamInfoView(BaseTeamView):
@@ -97,15 +92,14 @@ class TeamInfoView(BaseTeamView):
             self.team = team
 
         async def callback(self, interaction: discord.Interaction):
-            with get_session() as session:
-                self.team = session.get(Team, self.team.id)
-                message = await controller.fetch_message(interaction.channel, self.team)
-                await controller.show_team_detail(message, self.team)
-                view = TeamControlView(self.team)
-                await interaction.response.send_message(
-                    f"**{self.team.name}**팀 메뉴", view=view, ephemeral=True
-                )
-                self.view.stop()
+            self.team = await handler.get_team(self.team.id)
+            message = await controller.fetch_message(interaction.channel, self.team)
+            await controller.show_team_detail(message, self.team)
+            view = TeamControlView(self.team)
+            await interaction.response.send_message(
+                f"**{self.team.name}**팀 메뉴", view=view, ephemeral=True
+            )
+            self.view.stop()
 
 
 class TeamControlView(BaseTeamView):
@@ -116,40 +110,36 @@ class TeamControlView(BaseTeamView):
     @ui.button(label="참가", style=discord.ButtonStyle.success)
     async def join(self, interaction: discord.Interaction, button: ui.Button):
         await interaction.response.defer()
-        with get_session() as session:
-            await join_team(session, interaction, self.team)
+        await join_team(interaction, self.team)
 
     @ui.button(label="떠나기", style=discord.ButtonStyle.secondary)
     async def left(self, interaction: discord.Interaction, button: ui.Button):
         await interaction.response.defer()
-        with get_session() as session:
-            await left_team(session, interaction, self.team)
+        await left_team(interaction, self.team)
 
     @ui.button(label="팀 섞기", style=discord.ButtonStyle.primary)
     async def shuffle(self, interaction: discord.Interaction, button: ui.Button):
         await interaction.response.defer()
-        with get_session() as session:
-            self.team = session.get(Team, self.team.id)
-            message = await controller.fetch_message(interaction.channel, self.team)
-            members = self.team.members
+        self.team = await handler.get_team(self.team.id)
+        message = await controller.fetch_message(interaction.channel, self.team)
+        members = self.team.members
 
-            team_idx = await handler.get_random_team(session, self.team)
-            if len(members) == 5:
-                await controller.send_rank_team(message, self.team, team_idx)
-            else:
-                await controller.send_custom_team(message, self.team, team_idx)
+        team_idx = await handler.get_random_team(self.team)
+        if len(members) == 5:
+            await controller.send_rank_team(message, self.team, team_idx)
+        else:
+            await controller.send_custom_team(message, self.team, team_idx)
 
     @ui.button(label="팀 삭제", style=discord.ButtonStyle.danger)
     async def delete(self, interaction: discord.Interaction, button: ui.Button):
         await interaction.response.defer()
-        with get_session() as session:
-            self.team = session.get(Team, self.team.id)
-            message = await controller.fetch_message(interaction.channel, self.team)
-            await handler.delete_team(session, self.team)
-            await controller.send_delete_alert(message, self.team)
-            logger.info(
-                f"{interaction.user.name} (ID: {interaction.user.id}) deleted the team {self.team.name} (ID: {self.team.id})."
-            )
+        self.team = await handler.get_team(self.team.id)
+        message = await controller.fetch_message(interaction.channel, self.team)
+        await handler.delete_team(self.team)
+        await controller.send_delete_alert(message, self.team)
+        logger.info(
+            f"{interaction.user.name} (ID: {interaction.user.id}) deleted the team {self.team.name} (ID: {self.team.id})."
+        )
 
 
 class TeamShuffleView(BaseTeamView):
@@ -168,22 +158,19 @@ class TeamShuffleView(BaseTeamView):
 
         async def callback(self, interaction: discord.Interaction):
             await interaction.response.defer()
-            with get_session() as session:
-                self.team = session.get(Team, self.team.id)
-                message = await controller.fetch_message(interaction.channel, self.team)
-                members = self.team.members
-
-                team_idx = await handler.get_random_team(session, self.team)
-                if len(members) == 5:
-                    await controller.send_rank_team(message, self.team, team_idx)
-                else:
-                    await controller.send_custom_team(message, self.team, team_idx)
-
-
-async def join_team(db: Session, interaction: "discord.Interaction", team: Team):
-    team = db.get(Team, team.id)
-    await handler.add_member(
-        db,
+            self.team = await handler.get_team(self.team.id)
+            message = await controller.fetch_message(interaction.channel, self.team)
+            members = self.team.members
+
+            team_idx = await handler.get_random_team(self.team)
+            if len(members) == 5:
+                await controller.send_rank_team(message, self.team, team_idx)
+            else:
+                await controller.send_custom_team(message, self.team, team_idx)
+
+
+async def join_team(interaction: "discord.Interaction", team: Team):
+    team = await handler.add_member(
         team,
         interaction.user.id,
         interaction.user.name,
@@ -204,10 +191,8 @@ async def join_team(db: Session, interaction: "discord.Interaction", team: Team)
     )
 
 
-async def left_team(db: Session, interaction: "discord.Interaction", team: Team):
-    team = db.get(Team, team.id)
-    await handler.remove_member(
-        db,
+async def left_team(interaction: "discord.Interaction", team: Team):
+    team = await handler.remove_member(
         team,
         interaction.user.id,
         interaction.user.name,
@@ -0,0 +1,274 @@
+"""
+Agent 메시지 경로 부하 테스트
+
+가짜 Discord 스레드와 가짜 스트리밍 모델로 on_message -> parse_message -> call_agent ->
+Messenger.update_message 경로를 네트워크 없이 실행한다.
+
+    python -m bench.agent_load --threads 200 --messages 3 --token-rate 80
+
+동시성과 갱신 주기는 봇과 같은 환경 변수(AGENT_MAX_CONCURRENCY, LLM_MAX_CONCURRENCY,
+MESSAGE_UPDATE_INTERVAL 등)를 따른다.
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import resource
+import statistics
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+# app 모듈이 import 시점에 환경 변수를 읽으므로 먼저 설정
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "1000000000")
+os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "1000000000")
+os.environ.setdefault("AGENT_HISTORY_STORE", "memory")
+os.environ.setdefault("AGENT_SUMMARY_THRESHOLD", "1000000000")
+os.environ.setdefault("ROUTER_HEDGE_AFTER", "0")
+
+from agents import ModelResponse, Usage, set_tracing_disabled  # noqa: E402
+from agents.models.interface import Model  # noqa: E402
+from discord import ChannelType  # noqa: E402
+from openai.types.responses import (  # noqa: E402
+    Response,
+    ResponseCompletedEvent,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+)
+
+from app.cogs.agent import Agent  # noqa: E402
+from app.core.agent import handler  # noqa: E402
+
+ANSWER_LINES = [
+    "요청하신 내용을 정리해 보면 다음과 같아요.",
+    "첫 번째로 확인할 부분은 설정 파일의 경로입니다.",
+    "```python",
+    "def handler(event):",
+    "    return {'status': 'ok', 'items': [1, 2, 3]}",
+    "```",
+    "위 코드는 간단한 예시이고 실제 환경에 맞게 수정해야 해요.",
+    "- 항목 하나",
+    "- 항목 둘",
+]
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class FakeModel(Model):
+    def __init__(
+        self, latency: float, token_rate: float, answer_tokens: int, chunk: int
+    ):
+        self.latency = latency
+        self.token_rate = token_rate
+        self.answer_tokens = answer_tokens
+        self.chunk = chunk
+
+    def _tokens(self) -> list[str]:
+        words = itertools.cycle(
+            word + ("\n" if idx == len(line.split()) - 1 else " ")
+            for line in ANSWER_LINES
+            for idx, word in enumerate(line.split())
+        )
+        return list(itertools.islice(words, self.answer_tokens))
+
+    def _response(self, text: str) -> Response:
+        return Response(
+            id="fake",
+            created_at=time.time(),
+            model="fake",
+            object="response",
+            output=[
+                ResponseOutputMessage(
+                    id="fake",
+                    content=[
+                        ResponseOutputText(
+                            annotations=[], text=text, type="output_text"
+                        )
+                    ],
+                    role="assistant",
+                    status="completed",
+                    type="message",
+                )
+            ],
+            parallel_tool_calls=False,
+            tool_choice="auto",
+            tools=[],
+        )
+
+    async def get_response(self, *args, **kwargs) -> ModelResponse:
+        await asyncio.sleep(self.latency + self.answer_tokens / self.token_rate)
+        response = self._response("".join(self._tokens()))
+        return ModelResponse(
+            output=response.output,
+            usage=Usage(requests=1, total_tokens=self.answer_tokens),
+            response_id=None,
+        )
+
+    async def stream_response(self, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        tokens = self._tokens()
+        sequence = 0
+        for start in range(0, len(tokens), self.chunk):
+            await asyncio.sleep(self.chunk / self.token_rate)
+            sequence += 1
+            yield ResponseTextDeltaEvent(
+                content_index=0,
+                delta="".join(tokens[start : start + self.chunk]),
+                item_id="fake",
+                logprobs=[],
+                output_index=0,
+                sequence_number=sequence,
+                type="response.output_text.delta",
+            )
+        yield ResponseCompletedEvent(
+            response=self._response("".join(tokens)),
+            sequence_number=sequence + 1,
+            type="response.completed",
+        )
+
+
+class FakeSentMessage:
+    def __init__(self, thread: "FakeThread"):
+        self.thread = thread
+
+    async def edit(self, content: str) -> None:
+        await asyncio.sleep(self.thread.api_latency)
+        self.thread.record("edit")
+
+
+class FakeThread:
+    def __init__(self, id: int, owner, api_latency: float):
+        self.id = id
+        self.type = ChannelType.public_thread
+        self.owner = owner
+        self.api_latency = api_latency
+        self.answer: dict | None = None
+
+    def record(self, op: str) -> None:
+        answer = self.answer
+        if answer is None:
+            return
+        answer[op] += 1
+        if op == "edit" and answer["first_edit"] is None:
+            answer["first_edit"] = time.perf_counter() - answer["submitted"]
+
+    async def send(self, content: str) -> FakeSentMessage:
+        await asyncio.sleep(self.api_latency)
+        self.record("send")
+        return FakeSentMessage(self)
+
+
+class BenchAgent(Agent):
+    def __init__(self, bot):
+        super().__init__(bot)
+        self.answers: list[dict] = []
+        self.done: dict[int, asyncio.Event] = {}
+
+    async def respond(self, thread_id: int, messages):
+        try:
+            await super().respond(thread_id, messages)
+        finally:
+            thread = messages[-1].channel
+            thread.answer["total"] = time.perf_counter() - thread.answer["submitted"]
+            self.answers.append(thread.answer)
+            self.done[thread_id].set()
+
+
+async def measure_loop_lag(samples: list[float], interval: float = 0.01) -> None:
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - started - interval)
+
+
+async def run_thread(cog: BenchAgent, thread: FakeThread, args) -> None:
+    author = SimpleNamespace(id=thread.id, name=f"user{thread.id}")
+    for idx in range(args.messages):
+        thread.answer = {
+            "submitted": time.perf_counter(),
+            "first_edit": None,
+            "send": 0,
+            "edit": 0,
+        }
+        done = cog.done[thread.id] = asyncio.Event()
+        message = SimpleNamespace(
+            id=idx,
+            content=f"질문 {idx}: 설정 파일은 어떻게 작성하나요?",
+            channel=thread,
+            author=author,
+            attachments=[],
+        )
+        await cog.on_message(message)
+        await done.wait()
+        await asyncio.sleep(args.think_time)
+
+
+async def main(args) -> None:
+    set_tracing_disabled(True)
+    model = FakeModel(args.latency, args.token_rate, args.answer_tokens, args.chunk)
+    handler.router._agent_for = lambda agent, spec: agent.clone(model=model)
+
+    bot_user = SimpleNamespace(id=0, name="servant")
+    cog = BenchAgent(SimpleNamespace(user=bot_user))
+    threads = [
+        FakeThread(idx + 1, bot_user, args.api_latency) for idx in range(args.threads)
+    ]
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    lag: list[float] = []
+    lag_task = asyncio.create_task(measure_loop_lag(lag))
+    started = time.perf_counter()
+    await asyncio.gather(*(run_thread(cog, thread, args) for thread in threads))
+    elapsed = time.perf_counter() - started
+    lag_task.cancel()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    answers = cog.answers
+    first_edits = [a["first_edit"] for a in answers if a["first_edit"] is not None]
+    totals = [a["total"] for a in answers]
+    edits = [a["edit"] for a in answers]
+    sends = [a["send"] for a in answers]
+    print(f"threads               {args.threads} x {args.messages} messages")
+    print(f"answers               {len(answers)} in {elapsed:.2f}s")
+    print(f"throughput            {len(answers) / elapsed:.1f} answers/s")
+    for name, values in (("time to first edit", first_edits), ("answer time", totals)):
+        print(
+            f"{name:<22}p50 {percentile(values, 0.5):.3f}s  "
+            f"p99 {percentile(values, 0.99):.3f}s  max {max(values, default=0):.3f}s"
+        )
+    print(f"edits per answer      mean {statistics.fmean(edits):.1f}  max {max(edits)}")
+    print(f"sends per answer      mean {statistics.fmean(sends):.1f}  max {max(sends)}")
+    print(
+        f"event loop lag        p50 {percentile(lag, 0.5) * 1000:.1f}ms  "
+        f"p99 {percentile(lag, 0.99) * 1000:.1f}ms  max {max(lag) * 1000:.1f}ms"
+    )
+    print(f"max rss growth        {(rss_after - rss_before) / 1024:.1f} MiB")
+    if args.tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        print(
+            f"traced memory         current {current / 2**20:.1f} MiB  "
+            f"peak {peak / 2**20:.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=3, help="messages per thread")
+    parser.add_argument("--think-time", type=float, default=0.5)
+    parser.add_argument("--latency", type=float, default=0.5, help="model first token")
+    parser.add_argument("--token-rate", type=float, default=100, help="tokens/s")
+    parser.add_argument("--answer-tokens", type=int, default=400)
+    parser.add_argument("--chunk", type=int, default=4, help="tokens per delta")
+    parser.add_argument("--api-latency", type=float, default=0.05)
+    parser.add_argument("--tracemalloc", action="store_true")
+    asyncio.run(main(parser.parse_args()))
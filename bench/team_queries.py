@@ -0,0 +1,111 @@
+"""
+팀 조회/렌더링 쿼리 수 측정
+
+팀 수와 팀원 수를 늘려 가며 handler 함수가 실행하는 SQL 문 수를 센다.
+"전체 문장/SELECT" 형식으로 출력하며, 팀 수와 관계없이 쿼리 수가 같지 않거나
+캐시된 팀의 참가/취소가 SELECT를 실행하면 실패(exit 1)한다.
+
+    python -m bench.team_queries --teams 1 10 100 --members 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+# app.core.database가 import 시점에 엔진을 만들므로 먼저 설정
+os.environ["DATABASE_TYPE"] = "sqlite"
+os.environ["SQLITE_FILE_NAME"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+from sqlalchemy import event  # noqa: E402
+
+from app.core.database import create_db_and_tables, engine  # noqa: E402
+from app.core.team import handler  # noqa: E402
+from app.core.team.cache import active_teams  # noqa: E402
+
+GUILD_ID = 1
+CHANNEL_ID = 1
+
+# 캐시된 팀에 대해 읽기 없이 처리되어야 하는 작업
+NO_READS = ["get_team_list", "get_team", "add_member", "remove_member"]
+
+statements = 0
+selects = 0
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    global statements, selects
+    statements += 1
+    selects += statement.lstrip().upper().startswith("SELECT")
+
+
+async def count(coro) -> tuple[int, int]:
+    global statements, selects
+    statements = selects = 0
+    await coro
+    return statements, selects
+
+
+def render(teams) -> None:
+    # controller가 렌더링할 때 읽는 속성들, lazy load가 일어나면 예외 발생
+    for idx, team in enumerate(teams):
+        f"{idx + 1}. {team.name} ({len(team.members)}명) {datetime.now() - team.created_at}"
+        " - ".join(f"<@{member.discord_id}> ({member.name})" for member in team.members)
+
+
+async def measure(team_count: int, member_count: int) -> dict[str, int]:
+    channel_id = CHANNEL_ID + team_count
+    teams = []
+    for idx in range(team_count):
+        team = await handler.create_team(idx, f"team{idx}", GUILD_ID, channel_id)
+        for user_id in range(member_count):
+            team = await handler.add_member(team, user_id, f"user{user_id}")
+        teams.append(team)
+    team = teams[0]
+
+    async def list_and_render():
+        render(await handler.get_team_list(GUILD_ID, channel_id))
+
+    async def get_and_render():
+        render([await handler.get_team(team.id)])
+
+    active_teams.clear()
+    return {
+        "get_team_list (cold)": await count(list_and_render()),
+        "get_team_list": await count(list_and_render()),
+        "get_team": await count(get_and_render()),
+        "add_member": await count(handler.add_member(team, 10_000, "new")),
+        "remove_member": await count(handler.remove_member(team, 10_000, "new")),
+        "get_random_team": await count(handler.get_random_team(team)),
+    }
+
+
+async def main(args) -> int:
+    create_db_and_tables()
+    results = {n: await measure(n, args.members) for n in args.teams}
+    operations = list(next(iter(results.values())))
+    print(f"{'operation':<22}" + "".join(f"{f'{n} teams':>12}" for n in args.teams))
+    failed = False
+    for operation in operations:
+        counts = [results[n][operation] for n in args.teams]
+        failed |= len(set(counts)) > 1
+        if operation in NO_READS:
+            failed |= any(reads for _, reads in counts)
+        print(
+            f"{operation:<22}"
+            + "".join(f"{f'{total}/{reads}':>12}" for total, reads in counts)
+        )
+    print("query counts are as expected" if not failed else "unexpected queries")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--teams", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--members", type=int, default=5)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,153 @@
+"""
+text_splitter 벤치마크와 속성 검사
+
+    python -m bench.text_splitter                     # 코퍼스별 시간/메모리 측정
+    python -m bench.text_splitter --save base.json    # 결과를 기준값으로 저장
+    python -m bench.text_splitter --compare base.json # 기준값과 비교
+    python -m bench.text_splitter --check             # 무작위 입력으로 속성 검사
+
+검사하는 속성
+- 모든 청크는 max_chunk_size 이하
+- 입력의 코드 펜스가 닫혀 있으면 각 청크의 펜스도 짝이 맞음
+- 공백과 펜스 줄을 제외한 내용이 순서대로 보존됨
+(다시 열 수 없을 만큼 긴 펜스 줄이 있는 입력은 크기만 검사)
+"""
+
+import argparse
+import json
+import random
+import signal
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+from app.common.utils.text_splitter import IncrementalSplitter, split_into_chunks
+from tests.splitter_checks import (
+    KOREAN,
+    check_chunks,
+    random_code,
+    random_prose,
+    random_text,
+)
+
+Splitter = Callable[[str, int], list[str]]
+
+SPLITTERS: dict[str, Splitter] = {
+    "split_into_chunks": split_into_chunks,
+    "incremental": lambda text, size: IncrementalSplitter(size)(text),
+}
+
+
+def build_corpora(size: int) -> dict[str, str]:
+    rng = random.Random(0)
+    mixed = []
+    while sum(map(len, mixed)) < size:
+        if rng.random() < 0.3:
+            mixed.append(random_code(rng, rng.randint(1, 60)))
+        else:
+            mixed.append(random_prose(rng, rng.randint(50, 800)))
+    return {
+        "prose": random_prose(rng, size),
+        "mixed": "\n\n".join(mixed),
+        "huge_code_block": random_code(rng, size // 40),
+        "tiny_fences": "\n".join("```\nx\n```" for _ in range(size // 10)),
+        "no_newlines": "a" * size,
+        "korean": (KOREAN * (size // len(KOREAN) + 1))[:size],
+        "korean_lines": "\n".join(KOREAN * 3 for _ in range(size // (len(KOREAN) * 3))),
+    }
+
+
+def measure(splitter: Splitter, text: str, size: int, repeat: int) -> dict:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = splitter(text, size)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    splitter(text, size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    kb = len(text.encode()) / 1024
+    return {
+        "chunks": len(chunks),
+        "ms_per_kb": best * 1000 / kb,
+        "peak_bytes_per_kb": peak / kb,
+    }
+
+
+def _timeout(signum, frame):
+    raise TimeoutError("splitter did not finish")
+
+
+def run_check(names: list[str], iterations: int, seed: int) -> int:
+    # 무한 루프에 빠지는 입력도 실패로 기록
+    signal.signal(signal.SIGALRM, _timeout)
+    rng = random.Random(seed)
+    failures = 0
+    for iteration in range(iterations):
+        text = random_text(rng)
+        size = rng.choice([40, 100, 500, 2000])
+        for name in names:
+            signal.alarm(5)
+            try:
+                errors = check_chunks(text, SPLITTERS[name](text, size), size)
+            except Exception as e:
+                errors = [f"raised {e!r}"]
+            finally:
+                signal.alarm(0)
+            if errors:
+                failures += 1
+                print(f"[{name}] iteration {iteration} size {size}: {errors[0]}")
+    print(f"{failures} failures in {iterations} iterations")
+    return failures
+
+
+def run_bench(names: list[str], size: int, repeat: int) -> dict:
+    results = {}
+    for corpus, text in build_corpora(size).items():
+        for name in names:
+            result = measure(SPLITTERS[name], text, 2000, repeat)
+            results[f"{name}/{corpus}"] = result
+    return results
+
+
+def print_results(results: dict, baseline: dict | None) -> None:
+    print(f"{'case':<40}{'chunks':>8}{'ms/KB':>10}{'peak B/KB':>12}{'speedup':>9}")
+    for case, result in results.items():
+        speedup = ""
+        if baseline and case in baseline:
+            speedup = f"{baseline[case]['ms_per_kb'] / result['ms_per_kb']:.2f}x"
+        print(
+            f"{case:<40}{result['chunks']:>8}{result['ms_per_kb']:>10.4f}"
+            f"{result['peak_bytes_per_kb']:>12.0f}{speedup:>9}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--splitter", choices=SPLITTERS, action="append")
+    parser.add_argument("--size", type=int, default=200_000, help="corpus chars")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save")
+    parser.add_argument("--compare")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    names = args.splitter or list(SPLITTERS)
+
+    if args.check:
+        sys.exit(1 if run_check(names, args.iterations, args.seed) else 0)
+
+    results = run_bench(names, args.size, args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1 @@
+# 저장소 루트를 sys.path에 올려 `pytest`만으로도 app 패키지를 import할 수 있게 함
@@ -0,0 +1,100 @@
+"""
+text_splitter 속성 검사에 쓰는 무작위 입력 생성기와 검사 함수
+
+tests/test_text_splitter.py와 bench/text_splitter.py --check가 함께 사용
+"""
+
+import random
+import re
+
+from app.common.utils.text_splitter import FENCE_PATTERN
+
+KOREAN = "가나다라마바사아자차카타파하 한국어 문장은 여러 바이트로 인코딩됩니다. "
+WORDS = ["alpha", "beta", "gamma", "delta", "`inline`", "**bold**", "- item", "1."]
+WHITESPACE_PATTERN = re.compile(r"\s")
+
+
+def random_prose(rng: random.Random, size: int) -> str:
+    lines = []
+    while sum(map(len, lines)) < size:
+        words = rng.choices(WORDS, k=rng.randint(1, 20))
+        lines.append(" ".join(words))
+    return "\n".join(lines)
+
+
+def random_code(rng: random.Random, lines: int) -> str:
+    language = rng.choice(["", "python", "js", "sql"])
+    body = "\n".join(
+        "    " * rng.randint(0, 3) + f"value_{i} = compute({i}, {rng.random():.6f})"
+        for i in range(lines)
+    )
+    return f"```{language}\n{body}\n```"
+
+
+def _is_fence(line: str, size: int) -> bool:
+    # 다시 열 자리가 없을 만큼 긴 펜스 줄은 splitter처럼 일반 텍스트로 봄
+    fits = len(line.strip()) + 5 + len("```") <= size
+    return FENCE_PATTERN.fullmatch(line) is not None and fits
+
+
+def _split_fences(text: str, size: int) -> tuple[list[str], bool]:
+    # 펜스 안의 펜스 모양 줄은 내용이므로 여닫는 상태를 따라가며 구분
+    content, inside = [], False
+    for line in text.split("\n"):
+        if _is_fence(line, size) and (not inside or line.strip() == "```"):
+            inside = not inside
+        else:
+            content.append(line)
+    return content, inside
+
+
+def _content(text: str, size: int) -> str:
+    # 펜스 줄은 청크 경계에서 다시 열고 닫히므로 비교에서 제외
+    return WHITESPACE_PATTERN.sub("", "".join(_split_fences(text, size)[0]))
+
+
+def _balanced(text: str, size: int) -> bool:
+    return not _split_fences(text, size)[1]
+
+
+def check_chunks(text: str, chunks: list[str], size: int) -> list[str]:
+    errors = []
+    for idx, chunk in enumerate(chunks):
+        if len(chunk) > size:
+            errors.append(f"chunk {idx} has {len(chunk)} > {size} chars")
+    # 너무 긴 펜스 줄은 일반 텍스트처럼 잘리므로 펜스 기준 검사는 크기만 확인
+    lines = text.split("\n")
+    if any(FENCE_PATTERN.fullmatch(l) and not _is_fence(l, size) for l in lines):
+        return errors
+    if _balanced(text, size):
+        for idx, chunk in enumerate(chunks):
+            if not _balanced(chunk, size):
+                errors.append(f"chunk {idx} has unbalanced fences")
+    if _content(text, size) != _content("\n".join(chunks), size):
+        errors.append("content changed")
+    return errors
+
+
+def random_text(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(1, 12)):
+        kind = rng.random()
+        if kind < 0.3:
+            parts.append(random_prose(rng, rng.randint(1, 500)))
+        elif kind < 0.5:
+            parts.append(random_code(rng, rng.randint(0, 80)))
+        elif kind < 0.6:
+            parts.append("```\nx\n```" * rng.randint(1, 5))
+        elif kind < 0.7:
+            parts.append(rng.choice("ab가") * rng.randint(1, 3000))
+        elif kind < 0.8:
+            parts.append(KOREAN * rng.randint(1, 40))
+        elif kind < 0.85:
+            parts.append("\n" * rng.randint(1, 5))
+        elif kind < 0.9:
+            # 청크 크기에 가까운 펜스 줄은 다시 열 수 없음
+            width = rng.choice([40, 100, 500, 2000]) - rng.randint(0, 8)
+            parts.append("```" + "a" * (width - 3) + "\nbody\n```")
+        else:
+            parts.append(f"```{rng.choice(['', 'py'])}\n" + random_prose(rng, 300))
+    return rng.choice(["\n", "\n\n"]).join(parts)
@@ -0,0 +1,68 @@
+import asyncio
+
+from app.core.agent.queue import ThreadDispatcher, raise_if_cancelled
+
+
+async def swallowing_stream(started: asyncio.Event):
+    # openai-agents의 RunResultStreaming.stream_events()처럼 취소를 잡고 끝남
+    started.set()
+    try:
+        for idx in range(100):
+            await asyncio.sleep(0.01)
+            yield idx
+    except asyncio.CancelledError:
+        return
+
+
+def run_cancel_on_new(check_cancelled: bool):
+    calls: list[list[str]] = []
+    outcomes: list[str] = []
+
+    async def main():
+        started = asyncio.Event()
+
+        async def handler(thread_id: int, batch: list[str]):
+            calls.append(batch)
+            try:
+                async for _ in swallowing_stream(started):
+                    pass
+                if check_cancelled:
+                    raise_if_cancelled()
+            except asyncio.CancelledError:
+                outcomes.append("cancelled")
+                raise
+            outcomes.append("completed")
+
+        dispatcher = ThreadDispatcher[str](
+            handler, max_concurrency=1, max_pending=5, cancel_on_new=True
+        )
+        dispatcher.submit(1, "first")
+        await started.wait()
+        started.clear()
+        dispatcher.submit(1, "second")
+        while dispatcher.stats()["threads"]:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    return calls, outcomes
+
+
+def test_cancel_on_new_retries_batch_after_swallowed_cancel():
+    calls, outcomes = run_cancel_on_new(check_cancelled=True)
+    assert calls == [["first"], ["first", "second"]]
+    assert outcomes == ["cancelled", "completed"]
+
+
+def test_swallowed_cancel_without_check_completes_early():
+    # 확인하지 않으면 잘린 답변이 정상 종료로 처리됨
+    calls, outcomes = run_cancel_on_new(check_cancelled=False)
+    assert calls == [["first"], ["second"]]
+    assert outcomes == ["completed", "completed"]
+
+
+def test_raise_if_cancelled_ignores_uncancelled_task():
+    async def main():
+        raise_if_cancelled()
+        return "ok"
+
+    assert asyncio.run(main()) == "ok"
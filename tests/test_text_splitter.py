@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from app.common.utils.text_splitter import IncrementalSplitter, split_into_chunks
+from splitter_checks import check_chunks, random_text
+
+SIZES = [40, 100, 500, 2000]
+SEEDS = range(50)
+
+
+def feed_prefixes(text: str, size: int, rng: random.Random):
+    splitter = IncrementalSplitter(size)
+    end = 0
+    while end < len(text):
+        end = min(len(text), end + rng.randint(1, 200))
+        yield text[:end], splitter(text[:end])
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_split_into_chunks(seed: int, size: int):
+    text = random_text(random.Random(seed))
+    assert check_chunks(text, split_into_chunks(text, size), size) == []
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_incremental_splitter(seed: int, size: int):
+    text = random_text(random.Random(seed))
+    assert check_chunks(text, IncrementalSplitter(size)(text), size) == []
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_incremental_splitter_growing_prefixes(seed: int, size: int):
+    rng = random.Random(seed)
+    text = random_text(rng)
+    chunks = []
+    for prefix, chunks in feed_prefixes(text, size, rng):
+        assert check_chunks(prefix, chunks, size) == []
+    # 조금씩 이어 붙여도 한 번에 나눈 결과와 같아야 함
+    assert chunks == IncrementalSplitter(size)(text)
+
+
+def test_incremental_splitter_append():
+    rng = random.Random(0)
+    text = random_text(rng)
+    splitter = IncrementalSplitter(100)
+    pos = 0
+    while pos < len(text):
+        step = rng.randint(1, 50)
+        splitter.append(text[pos : pos + step])
+        pos += step
+    assert splitter.chunks == IncrementalSplitter(100)(text)